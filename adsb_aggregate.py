@@ -0,0 +1,123 @@
+# Copyright 2016 Travis Painter (travis.painter@gmail.com)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+import antennarange
+import rangeoutput
+
+
+class Aggregator():
+    """
+    Merges snapshot files from many receivers into one range.
+    
+    Files are only read again when they change. Merging keeps the farthest
+    point of every sector, so merging a newer snapshot of the same receiver
+    is always safe.
+    """
+    
+    def __init__(self, name, format, snapshot=False):
+        self.name = name
+        self.output = rangeoutput.RangeOutput(name, format, snapshot)
+        self.range = None
+        # Last modification time and counters of every file merged so far.
+        self.mtimes = {}
+        self.counters = {}
+        
+    def update(self, filenames):
+        """
+        Merge the files that are new or changed since the last update.
+        
+        Returns True if anything was merged.
+        """
+        merged = False
+        for filename in filenames:
+            try:
+                mtime = os.stat(filename).st_mtime
+                if self.mtimes.get(filename) == mtime:
+                    continue
+                with open(filename, 'rb') as infile:
+                    other = antennarange.AntennaRange.from_bytes(infile.read())
+            except (OSError, ValueError) as e:
+                print("Skipping {}: {}".format(filename, e))
+                continue
+            
+            if self.range is None:
+                self.range = antennarange.AntennaRange(other.center, other.num_sector, other.num_layer)
+            elif not np.allclose(self.range.center, other.center):
+                print("Skipping {}: center {} is not {}.".format(filename, other.center, self.range.center))
+                continue
+            
+            try:
+                self.range.merge(other)
+            except ValueError as e:
+                print("Skipping {}: {}".format(filename, e))
+                continue
+            self.mtimes[filename] = mtime
+            self.counters[filename] = (other.points_seen, other.points_rejected)
+            merged = True
+            
+        if merged:
+            self.range.points_seen = sum(c[0] for c in self.counters.values())
+            self.range.points_rejected = sum(c[1] for c in self.counters.values())
+        return merged
+        
+    def write(self):
+        """
+        Write the merged range.
+        """
+        self.output.write(self.range)
+
+
+def findSnapshots(paths):
+    """
+    List snapshot files. Directories are searched for *.snap files.
+    """
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(glob.glob(os.path.join(path, '*.snap'))))
+        else:
+            filenames.append(path)
+    return filenames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog = "ADSBaggregate", 
+        description = "Merge range snapshots from many ADSB receivers into one map shape.")
+    parser.add_argument('paths', help="Snapshot files (see adsb_range.py --snapshot), or directories holding them.", nargs='+')
+    parser.add_argument('-n', '--name', help="Name of the merged output.", default='merged')
+    parser.add_argument('-j', '--json', help="Output range in JSON format instead of kml.", action='store_true')
+    parser.add_argument('-s', '--snapshot', help="Also write a snapshot of the merged range.", action='store_true')
+    parser.add_argument('--watch', help="Keep merging changed snapshots every WATCH seconds.", type=float, default=0)
+    args = parser.parse_args()
+    
+    aggregator = Aggregator(args.name, 'json' if args.json else 'kml', args.snapshot)
+    try:
+        while True:
+            if aggregator.update(findSnapshots(args.paths)):
+                aggregator.write()
+            elif aggregator.range is None:
+                print("No snapshots found.")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
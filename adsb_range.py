@@ -13,6 +13,8 @@
 # limitations under the License.
 
 import argparse
+import json
+import sys
 
 try:
     from twisted.internet import reactor
@@ -21,24 +23,62 @@ except ImportError:
 else:
     TWISTED_PRESENT = True
     
-from adsbconnection import AdsbConnection, AdsbConnectionNoTwisted
+from adsbconnection import AdsbConnection, AdsbConnectionNoTwisted, run_connections, run_workers, run_replay, PORTS
+from rangeserver import RangeServer
 
 def printWelcome():
     """
     Print initial program load text.
     """
     print("ADSB Range: Display the range of ADS-B receivers.")    
+    
+def readConfig(filename):
+    """
+    Read the list of receivers from a JSON config file.
+    
+    The file holds {"receivers": [...]}, where each receiver is an object with
+    "name" and "address", and optionally "input" (basestation, beast or avr),
+    "port" (default: that of the input), "lat", "lon", "format",
+    "interval" (seconds between writing the output file), "snapshot", "resume",
+    "windows" (list of hours), "density" and "overflow" (block or drop).
+    """
+    with open(filename) as infile:
+        config = json.load(infile)
+    
+    connections = []
+    for r in config['receivers']:
+        input = r.get('input', 'basestation')
+        connections.append([r['name'], r['address'], r.get('port', PORTS[input]), 
+                            (r.get('lat', 999.0), r.get('lon', 999.0)), 
+                            r.get('format', 'kml'), r.get('interval', 5*60),
+                            r.get('snapshot', False), r.get('resume', False),
+                            r.get('windows', []), r.get('density', False), input,
+                            r.get('overflow', 'block')])
+    return connections
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog = "ADSBrange", 
         description = "Save a map shape showing the range of ADSB messages received.")
     parser.add_argument('-n', '--name', help="Name of the receiver.", default='ADSB')
-    parser.add_argument('-a', '--address', help="IP address of the receiver.", required=True)
-    parser.add_argument('-p', '--port', help="Basestation port of the receiver. Default 30003", type=int, default=30003)
+    parser.add_argument('-a', '--address', help="IP address of the receiver.")
+    parser.add_argument('-p', '--port', help="Port of the receiver. Default 30003, or 30005 for beast and 30002 for avr input.", type=int)
+    parser.add_argument('-i', '--input', help="Output of the receiver to read. Default basestation", choices=sorted(PORTS), default='basestation')
     parser.add_argument('--lat', help="Latitude of the receiver's location in decimal. Example: 40.123", type=float, default=999.0)
     parser.add_argument('--lon', help="Longitude of the receiver's location in decimal. Example: -90.123", type=float, default=999.0)
     parser.add_argument('-j', '--json', help="Output range in JSON format instead of kml.", action='store_true')
+    parser.add_argument('-c', '--config', help="JSON file listing several receivers to collect from at once.")
+    parser.add_argument('-s', '--snapshot', help="Also write a snapshot file for adsb_aggregate.py.", action='store_true')
+    parser.add_argument('-r', '--resume', help="Continue from the last snapshot, and keep writing snapshots.", action='store_true')
+    parser.add_argument('-w', '--workers', help="Collect each receiver in its own process. Receivers need --lat/--lon.", action='store_true')
+    parser.add_argument('--http', help="Serve the ranges as GeoJSON over HTTP on this port.", type=int)
+    parser.add_argument('--http-address', help="Address the HTTP server listens on. Default 127.0.0.1", default='127.0.0.1')
+    parser.add_argument('--window', help="Also write the range of the last HOURS, e.g. --window 1 24 168. Runs until stopped.", nargs='+', type=int, default=[], metavar='HOURS')
+    parser.add_argument('--density', help="Also count points per sector and range, and write {name}_density.json.", action='store_true')
+    parser.add_argument('--overflow', help="When the receiver sends faster than it can be handled: wait for it (block), or drop the oldest lines (drop). Default block", choices=['block', 'drop'], default='block')
+    parser.add_argument('--replay', help="Build the range from recorded logs (may be .gz) of the --input kind instead of a receiver.", nargs='+', metavar='FILE')
     args = parser.parse_args()
+    if args.config is None and args.address is None and args.replay is None:
+        parser.error("either --address, --config or --replay is required")
     
     if args.json:
         format = 'json'
@@ -47,18 +87,44 @@ if __name__ == "__main__":
     
     printWelcome()
     
-    connections = []
-    connections.append([args.name, args.address, args.port, (args.lat, args.lon), format])    
+    if args.config:
+        connections = readConfig(args.config)
+    else:
+        connections = []
+        port = args.port if args.port is not None else PORTS[args.input]
+        connections.append([args.name, args.address, port, (args.lat, args.lon), format, 5*60, args.snapshot, args.resume, args.window, args.density, args.input, args.overflow])    
     connectionlist = []
     
+    if args.replay:
+        try:
+            run_replay(connections[0], args.replay)
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit()
+    
+    server = None
+    if args.http:
+        server = RangeServer(args.http, args.http_address)
+    
     print("Connecting to receiver...")
     
+    if args.workers:
+        try:
+            run_workers(connections, server)
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit()
+    
     for c in connections:
         if TWISTED_PRESENT:
-            h = AdsbConnection(c[0], c[1], c[2], c[3], c[4])
+            h = AdsbConnection(*c)
         else:
-            h = AdsbConnectionNoTwisted(c[0], c[1], c[2], c[3], c[4])
+            h = AdsbConnectionNoTwisted(*c)
+        if server:
+            h.publishTo(server)
         connectionlist.append(h)        
     
     if TWISTED_PRESENT:
-        reactor.run()
\ No newline at end of file
+        reactor.run()
+    else:
+        run_connections(connectionlist)
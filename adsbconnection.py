@@ -13,19 +13,85 @@
 # limitations under the License.
 
 import time
-import sys
-import json, time
+import asyncio
+import gzip
+import multiprocessing
+import os
+
+import numpy as np
 
 try:
-    from twisted.internet import reactor, threads, task
+    from twisted.internet import reactor, threads, task, protocol
     from twisted.internet.endpoints import TCP4ClientEndpoint, connectProtocol
     from twisted.protocols import basic
 except ImportError:
-    # Only required if Twisted isn't availible
-    import socket
+    # Optional. Without Twisted, receivers are read with asyncio.
+    pass
 
 import py1090 #This has been modified slightly to remove 'enum' import.
 import antennarange
+import rangeoutput
+import metrics
+
+# Shape of the range kept for each receiver.
+SECTORS = 720
+LAYERS = 5
+
+# Default port of each kind of receiver output.
+PORTS = {'basestation': 30003, 'beast': 30005, 'avr': 30002}
+
+# Reader of the raw outputs. BaseStation lines are parsed one by one.
+READERS = {'beast': py1090.BeastReader, 'avr': py1090.AvrReader}
+
+# Start of every BaseStation line. Lines that start otherwise count as
+# parse failures, as do position messages that can't be parsed.
+BASESTATION_PREFIXES = ('MSG,', 'SEL,', 'ID,', 'AIR,', 'STA,', 'CLK,')
+
+
+def makeRange(name, center, resume=False, windows=(), density=False):
+    """
+    Create the range of a receiver.
+    
+    With resume, collection continues from the receiver's last snapshot if
+    there is one that matches the center and shape. With windows (in hours),
+    the range keeps an hourly history long enough for the longest window.
+    With density, it also counts points per sector and range.
+    """
+    antenna_range = _makeRange(name, center, resume)
+    if windows:
+        antenna_range.keep_history(max(windows) + 1)
+    if density:
+        antenna_range.keep_density()
+    return antenna_range
+
+
+def _makeRange(name, center, resume):
+    """
+    Create the range of a receiver, from its last snapshot when resuming.
+    """
+    filename = rangeoutput.snapshotFilename(name)
+    if resume and os.path.exists(filename):
+        try:
+            saved = antennarange.AntennaRange.load(filename)
+        except (OSError, ValueError) as e:
+            print("Can't resume from {}: {}".format(filename, e))
+        else:
+            if (saved.num_sector, saved.num_layer) != (SECTORS, LAYERS):
+                print("Can't resume from {}: different sectors or layers.".format(filename))
+            elif center != (999.0, 999.0) and center != saved.center:
+                print("Can't resume from {}: center {} is not {}.".format(filename, saved.center, center))
+            else:
+                print("Resuming from {} ({} points seen).".format(filename, saved.points_seen))
+                return saved
+    return antennarange.AntennaRange(center, SECTORS, LAYERS)
+
+
+def windowOutputs(name, format, windows):
+    """
+    Returns a (seconds, RangeOutput) pair for each window in hours, written to {name}_{hours}h_range.
+    """
+    return [(hours * 60 * 60, rangeoutput.RangeOutput('{}_{}h'.format(name, hours), format)) 
+            for hours in windows]
 
 
 class AdsbConnection():
@@ -33,28 +99,46 @@ class AdsbConnection():
     Connection to ADSB basestation receiver.
     """
     
-    def __init__(self, name, address, port, center, format):
+    # Seconds between publishing the range to a RangeServer.
+    publishInterval = 5
+    # Seconds between logging the stats and writing {name}_stats.json.
+    statsInterval = 60
+    # Connections not closed yet. The reactor is stopped when the last one closes.
+    running = 0
+    
+    def __init__(self, name, address, port, center, format, interval=5*60, snapshot=False, resume=False, windows=(), density=False, input='basestation', overflow='block'):
         self.name = name
         self.address = address
         self.port = port
         self.center = center     
         self.format = format    
+        # Snapshots are also the checkpoints to resume from.
+        self.snapshot = snapshot or resume
 
-        self.layers = 5
-        self.range = antennarange.AntennaRange(self.center, 720, self.layers)
+        self.layers = LAYERS
+        self.range = makeRange(self.name, self.center, resume, windows, density)
+        self.output = rangeoutput.RangeOutput(self.name, self.format, self.snapshot)
+        self.windows = windowOutputs(self.name, self.format, windows)
+        self.server = None
+        self.connection = None
+        self.publishLc = None
+        self.reader = READERS[input]() if input in READERS else None
+        self.metrics = metrics.Metrics(self.name)
+        AdsbConnection.running += 1
         
-        if self.format == 'json':
-            self.lc = task.LoopingCall(self.writeJson)
-        else:
-            self.lc = task.LoopingCall(self.writeKml)
-        self.lc.start(5*60, now=False)
+        self.lc = task.LoopingCall(self.writeOutput)
+        self.lc.start(interval, now=False)
+        self.statsLc = task.LoopingCall(self.stats)
+        self.statsLc.start(self.statsInterval, now=False)
         
-        # Stop after 24 hours of collecting data.
-        reactor.callLater(24*60*60, self.close_connection)
+        if not self.windows:
+            # Stop after 24 hours of collecting data.
+            # With time windows, keep collecting until stopped.
+            reactor.callLater(24*60*60, self.close_connection)
         
         # Connect to ADSB receiver.
         point = TCP4ClientEndpoint(reactor, self.address, self.port)
-        d = connectProtocol(point, basic.LineOnlyReceiver())
+        d = connectProtocol(point, basic.LineOnlyReceiver() if self.reader is None else protocol.Protocol())
         d.addCallback(self.register_message_handler)
         
     def register_message_handler(self, connection):
@@ -64,118 +148,458 @@ class AdsbConnection():
         """
         print("Connected to antenna: {}".format(self.name))
         self.connection = connection
-        self.connection.lineReceived = self.message
+        if self.reader is None:
+            self.connection.lineReceived = self.message
+        else:
+            self.connection.dataReceived = self.data
         
     def message(self, message):
-        a = py1090.Message.from_string(message)
-        #sys.stdout.write(message + '\n')
+        # Only positions are used, so skip building a full py1090.Message.
+        self.metrics.lines += 1
+        try:
+            point = py1090.parse_position(message, strict=True)
+        except ValueError:
+            self.metrics.parseFailures += 1
+            return
+        
+        if point is not None:
+            self.range.add_point(point)
+        elif not message.startswith(BASESTATION_PREFIXES):
+            self.metrics.parseFailures += 1
+            
+    def messages(self, lines):
+        """
+        Add the positions in a chunk of BaseStation lines.
+        """
+        parse = py1090.parse_position
+        add = self.range.add_point
+        failures = 0
+        for line in lines:
+            try:
+                point = parse(line, True)
+            except ValueError:
+                failures += 1
+                continue
+            if point is not None:
+                add(point)
+            elif not line.startswith(BASESTATION_PREFIXES):
+                failures += 1
+        self.metrics.lines += len(lines)
+        self.metrics.parseFailures += failures
+            
+    def data(self, data):
+        """
+        Add the positions in the next chunk of a raw (Beast or AVR) output.
+        """
+        points = list(self.reader.positions(data))
+        if points:
+            self.range.add_points(points)
+        # For raw outputs, lines are messages and failures are parity errors.
+        decoder = self.reader.decoder
+        self.metrics.lines = decoder.messages
+        self.metrics.parseFailures = decoder.errors
         
-        if a.latitude is not None:
-            #print("{}: {}, {}, {}").format(a.hexident, a.latitude, a.longitude, a.altitude)
-            self.range.add_point((a.latitude, a.longitude, a.altitude))
+    def logStats(self):
+        """
+        Log a stats line and write the stats file, on this thread.
+        """
+        print(self.metrics.logLine(self.range))
+        self.metrics.write(self.metrics.summary(self.range))
         
-    def writeJson(self):
-        d = threads.deferToThread(self._writeJson)
-    
-    def _writeJson(self):
-        filename = '{}_range.json'.format(self.name)
-        print("Writing points to json file: {}".format(filename))
-        with open(filename, 'w') as outfile:
-            json.dump(self.range.range_shape(0), outfile)
+    def writeOutput(self):
+        # The snapshots are taken here, on the reactor thread, so the
+        # export thread sees a consistent range.
+        d = threads.deferToThread(self._writeOutput, self.range.snapshot(), self.windowSnapshots())
+        d.addErrback(self.writeFailed)
             
-    def writeKml(self):
-        d = threads.deferToThread(self._writeKml)
-        
-    def _writeKml(self):
-        filename = '{}_range.kml'.format(self.name)
-        print("Writing points to KML file: {}".format(filename))
-        with open(filename, 'w') as outfile:
-            outfile.write('''<?xml version="1.0" encoding="UTF-8"?>
-                            <kml xmlns="http://www.opengis.net/kml/2.2">
-                            <Folder><name>{} Ranges</name>'''.format(self.name))
-            for n in range(self.layers+1):
-                outfile.write('''<Placemark>
-                                <name>{}_{}ft</name>
-                                <Polygon>
-                                  <extrude>1</extrude>
-                                  <tessellate>1</tessellate>
-                                  <altitudeMode>relativeToGround</altitudeMode>
-                                  <outerBoundaryIs>
-                                    <LinearRing>
-                                      <coordinates>'''.format(self.name, n*10000))
-                for i in self.range.range_shape(n):
-                    # KML takes points in the form of [long],[lat],[alt]
-                    if i[0] is not None:
-                        outfile.write("{},{},{:.1f} ".format(i[1], i[0], n*10000/0.3048))        
-                outfile.write('''
-                                      </coordinates>
-                                    </LinearRing>
-                                  </outerBoundaryIs>
-                                </Polygon>
-                                </Placemark>''')
-            outfile.write('''</Folder></kml>''')
+    def _writeOutput(self, snapshot=None, windows=None):
+        """
+        Write the range, and its time windows, in the format chosen for this receiver, if they changed.
+        """
+        start = time.perf_counter()
+        self.output.write(snapshot or self.range.snapshot())
+        if windows is None:
+            windows = self.windowSnapshots()
+        for (seconds, output), window in zip(self.windows, windows):
+            output.write(window)
+        self.metrics.export.add(time.perf_counter() - start)
+        
+    def stats(self):
+        """
+        Log a stats line and write the stats file. The summary is taken here,
+        where points are added, and written on another thread.
+        """
+        print(self.metrics.logLine(self.range))
+        d = threads.deferToThread(self.metrics.write, self.metrics.summary(self.range))
+        d.addErrback(self.writeFailed)
+        
+    def writeFailed(self, failure):
+        """
+        Report an output or stats write that failed on another thread.
+        """
+        print("Writing for {} failed: {}".format(self.name, failure.getErrorMessage()))
+            
+    def windowSnapshots(self):
+        """
+        Returns the current RangeWindow of each time window.
+        """
+        return [self.range.window(seconds) for seconds, output in self.windows]
+                            
+    def publishTo(self, server):
+        """
+        Publish the range to a rangeserver.RangeServer every publishInterval seconds.
+        """
+        self.server = server
+        self.publishLc = task.LoopingCall(self.publish)
+        self.publishLc.start(self.publishInterval)
+        
+    def publish(self):
+        self.server.publish(self.name, self.range.snapshot())
+        self.server.publishStats(self.name, self.metrics.summary(self.range))
+        for (seconds, output), window in zip(self.windows, self.windowSnapshots()):
+            self.server.publish(output.name, window)
                             
     def close_connection(self):
         """ Close the connection to the ADSB receiver and cleanup.
+        
+        The reactor is stopped once every receiver has closed.
         """
-        self._writeKml()
-        print("Stopping the program.")
-        reactor.stop()
+        for lc in (self.lc, self.statsLc, self.publishLc):
+            if lc is not None and lc.running:
+                lc.stop()
+        if self.connection is not None:
+            self.connection.transport.loseConnection()
+        self._writeOutput()
+        self.logStats()
+        print("Stopping collection for: {}".format(self.name))
+        
+        AdsbConnection.running -= 1
+        if not AdsbConnection.running and reactor.running:
+            print("Stopping the program.")
+            reactor.stop()
         
         
 class AdsbConnectionNoTwisted(AdsbConnection):
     """
     Connection handler for when Twisted module is not availible.
+    
+    Nothing happens until run() is awaited. Use run_connections() to
+    collect from several receivers on one asyncio event loop.
+    
+    The receiver is read on a thread of its own, into a queue of at most
+    queueBatches batches of lines. When it is full, overflow 'block' stops
+    reading until there is room, and 'drop' drops the oldest batch. Output
+    files are written on the default executor, so the queue is drained
+    while they are written.
     """
     
-    def __init__(self, name, address, port, center, format):
+    # Batches of lines (or raw chunks) waiting to be handled.
+    queueBatches = 64
+    
+    def __init__(self, name, address, port, center, format, interval=5*60, snapshot=False, resume=False, windows=(), density=False, input='basestation', overflow='block'):
         self.name = name
         self.address = address
         self.port = port
         self.center = center     
         self.format = format    
+        # Snapshots are also the checkpoints to resume from.
+        self.snapshot = snapshot or resume
 
-        self.layers = 5
-        self.range = antennarange.AntennaRange(self.center, 720, self.layers)
+        self.layers = LAYERS
+        self.range = makeRange(self.name, self.center, resume, windows, density)
+        self.output = rangeoutput.RangeOutput(self.name, self.format, self.snapshot)
+        self.windows = windowOutputs(self.name, self.format, windows)
+        self.reader = READERS[input]() if input in READERS else None
+        self.metrics = metrics.Metrics(self.name)
+        self.overflow = overflow
+        
+        self.server = None
+        self.lastPublish = 0
+        self.lastStats = None
         
-        self.writeOutputInterval = 5 * 60
+        self.writeOutputInterval = interval
         self.lastOutput = None
-        self.stopCollectionInterval = 24 * 60 * 60
+        # With time windows, keep collecting until stopped.
+        self.stopCollectionInterval = None if self.windows else 24 * 60 * 60
         self.startTime = None
+        self.connection = None
         
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.connect((self.address, self.port))
-        self.connection = self.socket.makefile()
-        self._loop()
-        
-    def _loop(self):
+    async def run(self):
         """
-        
+        Connect to the receiver and collect until the collection time is over.
         """
+        try:
+            self.connection = await py1090.ThreadedConnection(self.address, self.port, max_batches=self.queueBatches, 
+                                                              overflow=self.overflow, raw=self.reader is not None).connect()
+        except OSError as e:
+            print("Could not connect to antenna {}: {}".format(self.name, e))
+            return
+        print("Connected to antenna: {}".format(self.name))
+        
+        loop = asyncio.get_running_loop()
         self.startTime = time.time()
         self.lastOutput = time.time()
+        self.lastStats = time.time()
         try:
-            for line in self.connection:
-                self.message(line)
+            while True:
+                if self.reader is None:
+                    received = await self.connection.readlines()
+                else:
+                    received = await self.connection.read()
+                if not received:
+                    print("Antenna {} closed the connection.".format(self.name))
+                    break
+                
+                connection = self.connection
+                self.metrics.bytes = connection.bytes_read
+                self.metrics.dropped = connection.batches_dropped
+                self.metrics.droppedBytes = connection.bytes_dropped
+                self.metrics.maxQueued = connection.max_queued
+                self.metrics.readLag.add(connection.last_delay)
+                start = time.perf_counter()
+                if self.reader is None:
+                    self.messages(received)
+                else:
+                    self.data(received)
+                self.metrics.process.add(time.perf_counter() - start)
                 
                 if time.time() > (self.lastOutput + self.writeOutputInterval):
-                    # Time to write a file again.
-                    self._writeKml()
+                    # Time to write a file again. Don't hold up the other receivers,
+                    # but take the snapshot here, where points are added.
+                    future = loop.run_in_executor(None, self._writeOutput, self.range.snapshot(), self.windowSnapshots())
+                    future.add_done_callback(self.writeDone)
                     self.lastOutput = time.time()
+                    
+                if self.server and time.time() > (self.lastPublish + self.publishInterval):
+                    self.publish()
+                    self.lastPublish = time.time()
+                    
+                if time.time() > (self.lastStats + self.statsInterval):
+                    print(self.metrics.logLine(self.range))
+                    future = loop.run_in_executor(None, self.metrics.write, self.metrics.summary(self.range))
+                    future.add_done_callback(self.writeDone)
+                    self.lastStats = time.time()
                 
-                if time.time() > (self.startTime + self.stopCollectionInterval):
+                if self.stopCollectionInterval and time.time() > (self.startTime + self.stopCollectionInterval):
                     # End program
-                    self.close_connection()
                     break
-        except KeyboardInterrupt:
-            self.close_connection()
                 
+                # A busy receiver must not starve the others.
+                await asyncio.sleep(0)
+        finally:
+            self.close_connection()
+        
+    def publishTo(self, server):
+        """
+        Publish the range to a rangeserver.RangeServer every publishInterval seconds.
+        """
+        self.server = server
+        
+    def writeDone(self, future):
+        """
+        Report an output or stats write on the executor that failed, as nothing waits for it.
+        """
+        if not future.cancelled() and future.exception() is not None:
+            print("Writing for {} failed: {!r}".format(self.name, future.exception()))
         
     def close_connection(self):
         """ Close the connection to the ADSB receiver and cleanup.
         """
-        self._writeKml()
-        self.socket.close()
-        print("Stopping the program.")
+        self._writeOutput()
+        self.logStats()
+        if self.server:
+            self.publish()
+        if self.connection is not None:
+            self.connection.close()
+        print("Stopping collection for: {}".format(self.name))
+        
+
+def run_connections(connections):
+    """
+    Run non-Twisted connections together on one asyncio event loop.
+    
+    Returns when every connection has finished.
+    """
+    async def run_all():
+        await asyncio.gather(*(c.run() for c in connections))
+    
+    try:
+        asyncio.run(run_all())
+    except KeyboardInterrupt:
+        # Each connection writes its output while being cancelled.
+        pass
+    print("Stopping the program.")
+
+
+class AdsbConnectionWorker(AdsbConnectionNoTwisted):
+    """
+    Connection handler that runs in a worker process.
+    
+    Instead of writing files, the sector array of its range is sent to the
+    coordinator (see run_workers()) on every output interval. Only the stats
+    are written here, to {name}_{index}_stats.json.
+    """
+    
+    def __init__(self, results, index, name, address, port, center, format, interval=5*60, snapshot=False, resume=False, windows=(), density=False, input='basestation', overflow='block'):
+        super().__init__(name, address, port, center, format, interval, input=input, overflow=overflow)
+        self.results = results
+        self.index = index
+        self.metrics = metrics.Metrics('{}_{}'.format(name, index))
+        
+    def _writeOutput(self, snapshot=None, windows=None):
+        snapshot = snapshot or self.range.snapshot()
+        self.results.put((self.index, snapshot.view(), 
+                          snapshot.points_seen, snapshot.points_rejected))
+        
+        
+def _runWorker(results, index, c):
+    """
+    Entry point of a worker process.
+    """
+    try:
+        run_connections([AdsbConnectionWorker(results, index, *c)])
+    finally:
+        # Tell the coordinator this worker is done.
+        results.put((index, None, 0, 0))
+
+
+def run_workers(connections, server=None):
+    """
+    Run every connection in its own process and write the output here.
+    
+    Each worker keeps a local range and periodically sends its sector array.
+    Arrays are merged by name, so connections sharing a name (and center)
+    end up in one output. Every connection needs a known center, and time
+    windows and density are not supported.
+    The merged ranges are also published to server, if given.
+    
+    Returns when every worker has finished.
+    """
+    outputs = {}
+    # Counters of each resumed range, before this run. Workers count from 0.
+    resumed = {}
+    for c in connections:
+        if c[3] == (999.0, 999.0):
+            raise ValueError("Receiver {} needs lat and lon to run in a worker.".format(c[0]))
+        if c[8]:
+            raise ValueError("Receiver {} can't keep time windows in a worker.".format(c[0]))
+        if c[9]:
+            raise ValueError("Receiver {} can't keep a density in a worker.".format(c[0]))
+        if c[0] not in outputs:
+            outputs[c[0]] = (makeRange(c[0], c[3], c[7]), rangeoutput.RangeOutput(c[0], c[4], c[6] or c[7]))
+            resumed[c[0]] = (outputs[c[0]][0].points_seen, outputs[c[0]][0].points_rejected)
+        
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_runWorker, args=(results, i, c), daemon=True) 
+               for i, c in enumerate(connections)]
+    # Latest (points seen, points rejected) of each worker.
+    counters = [(0, 0)] * len(connections)
+    for w in workers:
+        w.start()
         
-        
\ No newline at end of file
+    running = len(workers)
+    while running:
+        try:
+            index, layers, seen, rejected = results.get()
+        except KeyboardInterrupt:
+            # Workers got it too. Wait for their last arrays.
+            continue
+        if layers is None:
+            running -= 1
+            continue
+        
+        name = connections[index][0]
+        counters[index] = (seen, rejected)
+        antenna_range, output = outputs[name]
+        antenna_range.merge(layers)
+        antenna_range.points_seen = resumed[name][0] + sum(counters[i][0] for i, c in enumerate(connections) if c[0] == name)
+        antenna_range.points_rejected = resumed[name][1] + sum(counters[i][1] for i, c in enumerate(connections) if c[0] == name)
+        output.write(antenna_range)
+        if server:
+            server.publish(name, antenna_range.snapshot())
+    
+    for w in workers:
+        w.join()
+    print("Stopping the program.")
+
+
+def run_replay(c, filenames, chunkSize=4*1024*1024):
+    """
+    Build the range of a receiver from recorded logs, as fast as they can be read.
+    
+    Files ending in .gz are decompressed on the fly. They are read in large
+    chunks, parsed into columns with py1090.parse_columns() and the positions
+    of each chunk are added together. Time windows use the time of each
+    message. Raw (Beast or AVR) captures are decoded with their py1090 reader,
+    and can't be replayed with time windows. The output is written once, at
+    the end.
+    """
+    name, address, port, center, format, interval, snapshot, resume, windows, density, input, overflow = c
+    if input in READERS and windows:
+        raise ValueError("Time windows can only be replayed from BaseStation logs.")
+    antenna_range = makeRange(name, center, resume, windows, density)
+    reader = READERS[input]() if input in READERS else None
+    start = time.time()
+    lastTime = None
+    
+    for filename in filenames:
+        print("Replaying: {}".format(filename))
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'rb') as infile:
+            pending = b''
+            while True:
+                data = infile.read(chunkSize)
+                if reader is not None:
+                    if not data:
+                        break
+                    points = list(reader.positions(data))
+                    if points:
+                        antenna_range.add_points(points)
+                    continue
+                
+                chunk = pending + data
+                if data:
+                    # Only whole lines. The rest waits for the next chunk.
+                    end = chunk.rfind(b'\n') + 1
+                    chunk, pending = chunk[:end], chunk[end:]
+                
+                columns = py1090.parse_columns(chunk)
+                positions = (columns.valid & ((columns.transmission_type == 2) | (columns.transmission_type == 3)) & 
+                             ~np.isnan(columns.latitude) & ~np.isnan(columns.longitude))
+                if positions.any():
+                    points = np.column_stack((columns.latitude[positions], columns.longitude[positions], 
+                                              columns.altitude[positions]))
+                    lastTime = addTimedPoints(antenna_range, points, columns.timestamp[positions], lastTime)
+                if not data:
+                    break
+    
+    print("Replayed {} points in {:.1f} seconds.".format(antenna_range.points_seen, time.time() - start))
+    rangeoutput.RangeOutput(name, format, snapshot or resume).write(antenna_range)
+    for seconds, output in windowOutputs(name, format, windows):
+        output.write(antenna_range.window(seconds, lastTime))
+
+
+def addTimedPoints(antenna_range, points, times, lastTime=None):
+    """
+    Add points received at times (seconds since the epoch, NaN if unknown) to a range.
+    
+    With a history, the points of each time bucket are added together, in
+    order. Times never go back, and unknown times are those of the point
+    before, or lastTime. Returns the time of the last point.
+    """
+    if antenna_range.history is None:
+        antenna_range.add_points(points)
+        return lastTime
+    
+    if lastTime is not None:
+        times = np.concatenate(([lastTime], times))
+    times = np.fmax.accumulate(times)[-len(points):]
+    # Points before the first known time go in the oldest bucket.
+    times = np.nan_to_num(times, nan=0.0)
+    
+    buckets = times // antenna_range.history.bucket_seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(points)]))
+    for first, end in zip(starts, ends):
+        antenna_range.add_points(points[first:end], now=times[first])
+    return float(times[-1])
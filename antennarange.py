@@ -12,76 +12,450 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from math import degrees, radians, cos, sin, asin, sqrt, atan2
+from math import degrees, radians, cos, pi, ceil, floor
+import os
+import struct
+import time
 
+import numpy as np
 
-class AntennaRange():
+from py1090.helpers import ReferencePoint, EARTH_RADIUS as EARTH_RADIUS_METERS
+
+# Radius of earth in kilometers, the same as py1090 uses.
+EARTH_RADIUS = EARTH_RADIUS_METERS / 1000
+KM_PER_DEGREE = EARTH_RADIUS * pi / 180
+
+# Fast rejection of points that can't be a new farthest range.
+# Points are bucketed by octant in a flat local projection. Each octant uses the
+# shortest range of the sectors within REJECT_MARGIN degrees of it, shrunk by
+# REJECT_SAFETY, to cover the difference between the projection and haversine.
+REJECT_OCTANTS = 8
+REJECT_MARGIN = 15
+REJECT_SAFETY = 0.99
+# Thresholds only grow, so stale ones are still safe. Rebuild them at most
+# every REJECT_REBUILD points, and only if a sector max changed.
+REJECT_REBUILD = 1000
+
+# Points used to estimate the center when it isn't given. Points farther
+# from the median than CENTER_OUTLIER times the median distance are ignored.
+CENTER_POINTS = 501
+CENTER_OUTLIER = 3
+
+# Snapshot format: a 64 byte little-endian header, followed by the sector
+# array as little-endian float64, shape (layers + 1, sectors, 3).
+SNAPSHOT_MAGIC = b'ADSBRNG1'
+SNAPSHOT_HEADER = struct.Struct('<8sIIddQQ')
+SNAPSHOT_HEADER_SIZE = 64
+
+# Seconds covered by each bucket of the range history.
+HISTORY_BUCKET = 60 * 60
+
+# Density histogram: points are counted per layer, sector and DENSITY_BIN km
+# of range, up to DENSITY_MAX km. Farther points count in the last bin.
+DENSITY_BIN = 5
+DENSITY_MAX = 500
+
+
+class RangeData():
+    """
+    Read access shared by AntennaRange and RangeSnapshot.
+    
+    Needs num_sector, num_layer, center, layers, changed, epoch, points_seen,
+    points_rejected and density (a RangeDensity or None).
+    """
+    
+    def range_shape(self, layer = 0):
+        """
+        Returns list of points that can be used to create a polygon.
+        
+        Can also report just the altitudes layer requested. 
+        0 = All altitudes
+        Sectors without a point are (None, None).
+        """
+        points_list = []        
+        for lat, lon in self.layers[layer, :, :2].tolist():
+            if lat != lat:
+                points_list.append( (None, None) )
+            else:
+                points_list.append( (lat, lon) ) 
+            
+        return points_list
+        
+    def changed_since(self, epoch):
+        """
+        Returns a (layers + 1, sectors) boolean array of the sectors changed after epoch.
+        
+        Read epoch first and pass it next time, to see every change once.
+        """
+        return self.changed > epoch
+        
+    def view(self, layer = None):
+        """
+        Returns a read-only view of the sector array, without copying.
+        
+        The full array has shape (layers + 1, sectors, 3) holding (Lat, Long, Range),
+        with NaN for empty sectors. If layer is given, only that layer is returned.
+        """
+        v = self.layers.view()
+        v.flags.writeable = False
+        if layer is None:
+            return v
+        return v[layer]
+        
+    def density_contour(self, percent, layer = 0):
+        """
+        Returns the polygon within which percent of each sector's points were seen.
+        
+        Like range_shape(), with one point per sector, in the middle of the
+        sector. Ranges are rounded up to whole density bins. Needs a density.
+        """
+        ranges = self.density.percentile_ranges(percent, layer)
+        bearings = (np.arange(self.num_sector) + 0.5) * 2 * pi / self.num_sector
+        lat, lon = ReferencePoint(self.center[0], self.center[1], EARTH_RADIUS).destination(bearings, ranges)
+        
+        points_list = []
+        for lat, lon in zip(lat.tolist(), lon.tolist()):
+            if lat != lat:
+                points_list.append( (None, None) )
+            else:
+                points_list.append( (lat, lon) )
+        return points_list
+        
+    def density_cells(self, layer = 0):
+        """
+        Returns (lat, long, count) for every sector and range bin with points, at its middle.
+        
+        Needs a density.
+        """
+        counts = self.density.counts[layer]
+        sectors, bins = np.nonzero(counts)
+        center = ReferencePoint(self.center[0], self.center[1], EARTH_RADIUS)
+        lat, lon = center.destination((sectors + 0.5) * 2 * pi / self.num_sector, 
+                                      (bins + 0.5) * self.density.bin_km)
+        return list(zip(lat.tolist(), lon.tolist(), counts[sectors, bins].tolist()))
+        
+    def to_bytes(self):
+        """
+        Serialize the center, counters and sector array into a compact snapshot.
+        
+        Load it again with AntennaRange.from_bytes().
+        """
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.num_sector, self.num_layer, 
+                                      self.center[0], self.center[1], 
+                                      self.points_seen, self.points_rejected)
+        header = header.ljust(SNAPSHOT_HEADER_SIZE, b'\0')
+        return header + self.layers.astype('<f8').tobytes()
+        
+    def save(self, filename):
+        """
+        Write a snapshot (see to_bytes()) to a file, atomically.
+        
+        The file is written under a temporary name, flushed to disk and then
+        renamed, so a crash never leaves a partial file behind.
+        """
+        tempname = filename + '.tmp'
+        with open(tempname, 'wb') as outfile:
+            outfile.write(self.to_bytes())
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tempname, filename)
+
+
+class AntennaRange(RangeData):
 
     def __init__(self, center, sectors = 360, layers = 0):
         self.num_sector = sectors
         self.num_layer = layers
-        # Layer is [sector: (Lat, Long, Range)]
-        self.layers = [None for x in range(layers + 1)]
-        self.layers[0] = { x: (None, None, 0) for x in range(sectors) }
-        for i in range(1, layers + 1):
-            self.layers[i] = { x: (None, None, 0) for x in range(sectors) }
+        # Layers are [layer, sector, (Lat, Long, Range)]. Empty sectors are NaN.
+        self.layers = np.full((layers + 1, sectors, 3), np.nan)
+        
+        # Epoch counts changes. changed holds the epoch of each sector's last change.
+        self.epoch = 0
+        self.changed = np.zeros((layers + 1, sectors), dtype=np.int64)
+        self._snapshot = None
+        
+        # Optional farthest points per time bucket. See keep_history().
+        self.history = None
+        self._windows = {}
+        # Optional count of points per sector and range. See keep_density().
+        self.density = None
+        
+        # Counters for points processed after the center is set.
+        self.points_seen = 0
+        self.points_rejected = 0
+        # Sectors (of any layer) that got a farther point. add_points() counts
+        # each sector once per batch. Not saved in snapshots.
+        self.sector_updates = 0
+        self._reject_sq = [[0.0] * REJECT_OCTANTS for x in range(layers + 1)]
+        self._reject_stale = False
+        self._reject_countdown = REJECT_REBUILD
+        self._k_lon = 0.0
         
         self.center = center
         if self.center == (999.0, 999.0):
             # Coordinates of center were not given. 
             # Will try to find a reasonable guess.
             self.center_set = False
-            self.points_cloud = []
+            self._center_points = np.empty((CENTER_POINTS, 3))
+            self._center_count = 0
             print("No center coordinates given. Will estimate.")
         else:
-            self.center_set = True
+            self._set_center(center)
+        
+    def _set_center(self, center):
+        """
+        Fix the center. Its trig values, used for every point, are computed once.
+        """
+        self.center = center
+        self.center_set = True
+        self._reference = ReferencePoint(center[0], center[1], EARTH_RADIUS)
+        
+    def keep_history(self, buckets, bucket_seconds = HISTORY_BUCKET):
+        """
+        Also keep the farthest points of the last buckets time buckets, for window().
         
-    def add_point(self, point):
+        The history lives in memory only. It isn't part of snapshots, and
+        merge() doesn't add to it.
+        """
+        self.history = RangeHistory(self.layers.shape, buckets, bucket_seconds)
+        self._windows = {}
+        if self.center_set:
+            self._rebuild_reject()
+        
+    def keep_density(self, bin_km = DENSITY_BIN, max_km = DENSITY_MAX):
+        """
+        Also count the points per layer, sector and bin_km of range, up to max_km.
+        
+        Every point has to be counted, so points are no longer fast-rejected.
+        The counts live in memory only. They aren't part of snapshot files,
+        and merge() doesn't add to them.
+        """
+        self.density = RangeDensity(self.changed.shape, bin_km, max_km)
+        
+    def add_point(self, point, now = None):
         """
         Take a point and process it.
         point = (lat, long, alt)
+        
+        now is the time the point was received, for the history. Default: the current time.
         """
         if not self.center_set:
             # Accumulate points until a valid center has been found.
-            self._find_center(point)
+            self._find_center(point, now)
             return
         
         lay = self._find_layer(point)
+        
+        self.points_seen += 1
+        self._reject_countdown -= 1
+        if self._reject_countdown <= 0:
+            self._reject_countdown = REJECT_REBUILD
+            if self._reject_stale:
+                self._rebuild_reject()
+        if self.history is not None and self.history.advance(now):
+            # A new, empty bucket. Thresholds come from it, so start over.
+            self._rebuild_reject()
+        if self.density is None and self._reject(point, lay):
+            self.points_rejected += 1
+            return
+        
         s = self._find_sector(point)
         r = self._find_range(point)
+        if self.density is not None:
+            self.density.add(lay, s, r)
         
-        # Always check layer 0.
-        if self.layers[0][s][2] < r:
+        # Always check layer 0. A NaN (empty) range never compares >= r.
+        if not self.layers[0, s, 2] >= r:
             # New farthest range
-            self.layers[0][s] = ( point[0], point [1], r )        
+            self.layers[0, s] = ( point[0], point [1], r )        
+            self._reject_stale = True
+            self.epoch += 1
+            self.sector_updates += 1
+            self.changed[0, s] = self.epoch
         
         # Then check the layer that is returned.
-        if self.layers[lay][s][2] < r:
+        if not self.layers[lay, s, 2] >= r:
             # New farthest range
-            self.layers[lay][s] = ( point[0], point [1], r )
+            self.layers[lay, s] = ( point[0], point [1], r )
+            self._reject_stale = True
+            self.epoch += 1
+            self.sector_updates += 1
+            self.changed[lay, s] = self.epoch
+        
+        if self.history is not None:
+            bucket = self.history.current
+            if not bucket[0, s, 2] >= r:
+                bucket[0, s] = ( point[0], point [1], r )
+                self._reject_stale = True
+                self.history.epoch += 1
+            if not bucket[lay, s, 2] >= r:
+                bucket[lay, s] = ( point[0], point [1], r )
+                self._reject_stale = True
+                self.history.epoch += 1
+        
+    def add_points(self, points, now = None):
+        """
+        Take many points and process them together.
+        points = (N, 3) array of (lat, long, alt). A missing altitude may be None or NaN.
+        now is the time they were received, for the history. Default: the current time.
+        
+        The result is the same as calling add_point() for each point in order.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        
+        # Estimating the center depends on the order of points, so do it one by one.
+        n = 0
+        while not self.center_set and n < len(points):
+            lat, lon, alt = points[n].tolist()
+            self.add_point((lat, lon, None if alt != alt else alt), now)
+            n += 1
+        points = points[n:]
+        points = points[np.isfinite(points[:, 0]) & np.isfinite(points[:, 1])]
+        if len(points) == 0:
+            return
+        self.points_seen += len(points)
+        if self.history is not None and self.history.advance(now):
+            # A new, empty bucket. Thresholds come from it.
+            self._reject_stale = True
+        
+        lay = self._find_layers(points[:, 2])
+        s = self._find_sectors(points[:, 0], points[:, 1])
+        r = self._find_ranges(points[:, 0], points[:, 1])
+        if self.density is not None:
+            self.density.add_many(lay, s, r)
+        
+        # Every point is checked against layer 0 and against its own layer.
+        # Cells are numbered layer * num_sector + sector.
+        index = np.arange(len(points))
+        cells = np.concatenate((s, lay * self.num_sector + s))
+        index = np.concatenate((index, index))
+        ranges = r[index]
+        
+        # Scatter-max: sort by cell, then farthest first, then earliest first.
+        # The first entry of each cell is the point add_point() would keep.
+        order = np.lexsort((index, -ranges, cells))
+        cells = cells[order]
+        first = np.ones(len(cells), dtype=bool)
+        first[1:] = cells[1:] != cells[:-1]
+        
+        cells = cells[first]
+        best = index[order][first]
+        
+        # NumPy trig may differ from math in the last bit, so store the scalar range.
+        r_best = np.array([self._find_range(p) for p in points[best, :2].tolist()])
+        
+        farther = self._update_cells(self.layers, cells, points[best], r_best)
+        if farther.any():
+            self.epoch += 1
+            self.sector_updates += int(farther.sum())
+            self.changed.reshape(-1)[cells[farther]] = self.epoch
+            self._reject_stale = True
+        
+        if self.history is not None:
+            if self._update_cells(self.history.current, cells, points[best], r_best).any():
+                self.history.epoch += 1
+                self._reject_stale = True
+        
+        if self._reject_stale:
+            self._rebuild_reject()
+        
+    def _update_cells(self, layers, cells, points, ranges):
+        """
+        Store each point in its cell of layers, if it is farther than the stored one.
+        
+        Cells are numbered layer * num_sector + sector. Returns which points were stored.
+        """
+        flat = layers.reshape(-1, 3)
+        farther = ~(flat[cells, 2] >= ranges)
+        flat[cells[farther], :2] = points[farther, :2]
+        flat[cells[farther], 2] = ranges[farther]
+        return farther
+        
+    def _reject(self, point, lay):
+        """
+        Cheap check whether a point is certainly inside the current range.
+        
+        Only a few multiplies: no trig, no square root.
+        """
+        x = (point[1] - self.center[1]) * self._k_lon
+        y = (point[0] - self.center[0]) * KM_PER_DEGREE
+        
+        # Octants are numbered clockwise from north, like bearings.
+        if x >= 0:
+            if y >= 0:
+                octant = 0 if x < y else 1
+            else:
+                octant = 2 if x > -y else 3
+        else:
+            if y < 0:
+                octant = 4 if x > y else 5
+            else:
+                octant = 6 if -x > y else 7
+        
+        return x*x + y*y < self._reject_sq[lay][octant]
         
-    def _find_center(self, point):
+    def _rebuild_reject(self):
+        """
+        Recompute the fast rejection thresholds from the current sector maxima.
+        """
+        self._reject_stale = False
+        # With a history, only the current bucket is safe to compare against.
+        source = self.layers if self.history is None else self.history.current
+        ranges = np.nan_to_num(source[:, :, 2])
+        
+        width = 360.0 / self.num_sector
+        step = 360.0 / REJECT_OCTANTS
+        thresholds = np.empty((self.num_layer + 1, REJECT_OCTANTS))
+        for octant in range(REJECT_OCTANTS):
+            start = floor((octant * step - REJECT_MARGIN) / width)
+            end = ceil(((octant + 1) * step + REJECT_MARGIN) / width)
+            sectors = np.arange(start, end) % self.num_sector
+            thresholds[:, octant] = ranges[:, sectors].min(axis=1)
+        thresholds *= REJECT_SAFETY
+        
+        # Degrees of longitude shrink toward the pole. Scaling by the cosine at the
+        # equatorward edge keeps the projected distance above the true distance.
+        reach = thresholds.max() / KM_PER_DEGREE
+        if abs(self.center[0]) + reach >= 90:
+            # Range reaches over the pole. Don't reject anything.
+            thresholds[:] = 0
+        self._k_lon = KM_PER_DEGREE * cos(radians(max(abs(self.center[0]) - reach, 0)))
+        self._reject_sq = (thresholds ** 2).tolist()
+        
+    def _find_center(self, point, now = None):
         """
         If no center is given initially, find a good estimate to use.
         
-        This is just the average location over a certain number of points. 
+        Points are buffered as they come. Once there are enough,
+        the center is the average location of the points near the median,
+        so a few far away (bad) positions don't pull it off. The buffered
+        points are then added to the range, at now, the time of the point
+        that completed the buffer, and the buffer is freed.
         """        
-        self.points_cloud.append(point)
-        
-        if len(self.points_cloud) > 500:
-            # Assume this is enough to get a valid point.
-            lat_sum = 0
-            lon_sum = 0
-            for n in self.points_cloud:
-                lat_sum += n[0]
-                lon_sum += n[1]
-                
-            lat_avg = lat_sum / float(len(self.points_cloud))
-            lon_avg = lon_sum / float(len(self.points_cloud))
-            
-            self.center = (lat_avg, lon_avg)
-            self.center_set = True
-            print("Using center: ({:.1f}, {:.1f})".format(self.center[0], self.center[1]))
+        n = self._center_count
+        self._center_points[n] = (point[0], point[1], np.nan if point[2] is None else point[2])
+        self._center_count = n = n + 1
+        
+        if n < CENTER_POINTS:
+            return
+        
+        # Assume this is enough to get a valid point.
+        points = self._center_points
+        lat_median = np.median(points[:, 0])
+        lon_median = np.median(points[:, 1])
+        dy = points[:, 0] - lat_median
+        dx = (points[:, 1] - lon_median) * cos(radians(lat_median))
+        distance = np.hypot(dx, dy)
+        # At least half of the points are within the median distance.
+        near = distance <= CENTER_OUTLIER * np.median(distance)
+        center = (float(points[near, 0].mean()), float(points[near, 1].mean()))
+        
+        self._set_center(center)
+        print("Using center: ({:.1f}, {:.1f}), {} of {} points near the median.".format(
+            self.center[0], self.center[1], int(near.sum()), n))
+        
+        self._center_points = None
+        self.add_points(points, now)
     
     def _find_layer(self, point):
         """
@@ -98,23 +472,23 @@ class AntennaRange():
         
         if lay >= self.num_layer:
             return self.num_layer
+        elif lay < 0:
+            return 0
         else:
             return lay        
     
+    def _find_layers(self, alt):
+        """
+        Array version of _find_layer(). NaN altitudes go in layer 0.
+        """
+        lay = np.trunc(np.nan_to_num(alt) / 10000)
+        return np.clip(lay, 0, self.num_layer).astype(np.intp)
+    
     def _find_sector(self, point):
         """
         Return the sector that given point is located in.
         """
-        lat1 = radians(self.center[0])
-        lon1 = radians(self.center[1])
-        lat2 = radians(point[0])
-        lon2 = radians(point[1])  
-        
-        dlon = lon2 - lon1
-        
-        y = sin(dlon) * cos(lat2)
-        x = cos(lat1) * sin(lat2) - sin(lat1) * cos(lat2) * cos(dlon)
-        bearing = degrees(atan2(y, x)) #may be negative
+        bearing = degrees(self._reference.bearing_to(point[0], point[1])) #may be negative
         bearing_abs = (bearing + 360) % 360
         
         # Make bearing compatible with number of sectors.
@@ -122,35 +496,296 @@ class AntennaRange():
         bearing_mult = bearing_abs * self.num_sector / 360
         
         return int(bearing_mult % self.num_sector)
+    
+    def _find_sectors(self, lat, lon):
+        """
+        Array version of _find_sector().
+        """
+        bearing_abs = (np.degrees(self._reference.bearing_to(lat, lon)) + 360) % 360
+        bearing_mult = bearing_abs * self.num_sector / 360
+        
+        return (bearing_mult % self.num_sector).astype(np.intp)
         
     def _find_range(self, point):
         """
-        Return the distance from center to point. Haversine formula.
-        From: http://stackoverflow.com/a/4913653
-        Also: http://stackoverflow.com/a/21623206
+        Return the distance from center to point, in km. Haversine formula.
         """
-        lat1 = radians(self.center[0])
-        lon1 = radians(self.center[1])
-        lat2 = radians(point[0])
-        lon2 = radians(point[1])   
+        return self._reference.distance_to(point[0], point[1])
+    
+    def _find_ranges(self, lat, lon):
+        """
+        Array version of _find_range().
+        """
+        return self._reference.distance_to(lat, lon)
+        
+    def merge(self, layers):
+        """
+        Merge another range, or its sector array, into this one.
         
-        dlon = lon2 - lon1 
-        dlat = lat2 - lat1 
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a)) 
-        r = 6371 # Radius of earth in kilometers. Use 3956 for miles
+        layers is a range, a snapshot or an array shaped like view(). For every
+        layer and sector the farther of the two points is kept. Both ranges
+        must use the same center, sectors and layers. The history is not changed.
+        """
+        if isinstance(layers, RangeData):
+            layers = layers.layers
+        layers = np.asarray(layers)
+        if layers.shape != self.layers.shape:
+            raise ValueError("Can't merge sectors of shape {} into {}.".format(layers.shape, self.layers.shape))
         
-        return c * r
+        farther = layers[:, :, 2] > np.nan_to_num(self.layers[:, :, 2], nan=-1.0)
+        self.layers[farther] = layers[farther]
+        if farther.any():
+            self.epoch += 1
+            self.sector_updates += int(farther.sum())
+            self.changed[farther] = self.epoch
+            if self.center_set:
+                self._rebuild_reject()
         
-    def range_shape(self, layer = 0):
+    @classmethod
+    def from_bytes(cls, data):
         """
-        Returns list of points that can be used to create a polygon.
+        Create a range from a snapshot made by to_bytes().
+        """
+        antenna_range, shape = cls._from_header(data, len(data))
+        array = np.frombuffer(data, dtype='<f8', count=shape[0] * shape[1] * shape[2], 
+                              offset=SNAPSHOT_HEADER_SIZE)
+        antenna_range.layers[...] = array.reshape(shape)
+        if antenna_range.center_set:
+            antenna_range._rebuild_reject()
+        return antenna_range
         
-        Can also report just the altitudes layer requested. 
-        0 = All altitudes
+    @classmethod
+    def _from_header(cls, header, size):
         """
-        points_list = []        
-        for p in self.layers[layer].values():
-            points_list.append( (p[0], p[1]) ) 
-            
-        return points_list
\ No newline at end of file
+        Create an empty range from a snapshot header. Returns (range, array shape).
+        
+        size is the length of the whole snapshot. Raises ValueError if the
+        header is not that of a snapshot, or the size doesn't match it.
+        """
+        if len(header) < SNAPSHOT_HEADER_SIZE:
+            raise ValueError("Not an antenna range snapshot.")
+        try:
+            magic, sectors, layers, lat, lon, seen, rejected = SNAPSHOT_HEADER.unpack_from(header)
+        except struct.error:
+            raise ValueError("Not an antenna range snapshot.")
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not an antenna range snapshot.")
+        if size != SNAPSHOT_HEADER_SIZE + (layers + 1) * sectors * 3 * 8:
+            raise ValueError("Snapshot is {} bytes, not the size of {} sectors and {} layers.".format(size, sectors, layers))
+        
+        antenna_range = cls((lat, lon), sectors, layers)
+        antenna_range.points_seen = seen
+        antenna_range.points_rejected = rejected
+        return antenna_range, (layers + 1, sectors, 3)
+        
+    @classmethod
+    def load(cls, filename):
+        """
+        Create a range from a snapshot file written by save().
+        
+        The sector array is read into memory, so the file is not kept open
+        and can be replaced by the next checkpoint (on Windows too).
+        """
+        with open(filename, 'rb') as infile:
+            antenna_range, shape = cls._from_header(infile.read(SNAPSHOT_HEADER_SIZE), os.fstat(infile.fileno()).st_size)
+            array = np.fromfile(infile, dtype='<f8', count=shape[0] * shape[1] * shape[2])
+        antenna_range.layers[...] = array.reshape(shape)
+        if antenna_range.center_set:
+            antenna_range._rebuild_reject()
+        return antenna_range
+        
+    def snapshot(self):
+        """
+        Returns a consistent, read-only RangeSnapshot of the range.
+        
+        Call it from the thread that adds points, then hand the snapshot to
+        other threads (e.g. for exports). The arrays are only copied again
+        after the range changed, so repeated calls are cheap.
+        """
+        if self._snapshot is None or self._snapshot.epoch != self.epoch:
+            self._snapshot = RangeSnapshot(self)
+        elif (self._snapshot.points_seen, self._snapshot.points_rejected) != (self.points_seen, self.points_rejected):
+            # Same sectors, newer counters. Share the arrays.
+            self._snapshot = RangeSnapshot(self, self._snapshot)
+        return self._snapshot
+        
+    def window(self, seconds, now = None):
+        """
+        Returns a read-only RangeWindow of the farthest points of the last seconds.
+        
+        Needs keep_history(). Whole buckets are used, so the window covers at
+        least seconds (and up to one bucket more), but never more than the
+        history holds. Like snapshot(), call it from the thread adding points.
+        """
+        if self.history.advance(now) and self.center_set:
+            self._rebuild_reject()
+        window = self._windows.get(seconds)
+        if window is None or window.epoch != self.history.epoch:
+            window = RangeWindow(self, seconds, self.history.window(seconds))
+            self._windows[seconds] = window
+        return window
+
+
+class RangeSnapshot(RangeData):
+    """
+    Frozen copy of an AntennaRange at one epoch.
+    
+    origin is the range it was taken from.
+    """
+    
+    def __init__(self, antenna_range, share = None):
+        self.origin = antenna_range
+        self.num_sector = antenna_range.num_sector
+        self.num_layer = antenna_range.num_layer
+        self.center = antenna_range.center
+        self.center_set = antenna_range.center_set
+        self.epoch = antenna_range.epoch
+        self.points_seen = antenna_range.points_seen
+        self.points_rejected = antenna_range.points_rejected
+        # The density changes with every point, so it is always copied.
+        self.density = None if antenna_range.density is None else antenna_range.density.copy()
+        if share is None:
+            self.layers = antenna_range.layers.copy()
+            self.changed = antenna_range.changed.copy()
+            self.layers.flags.writeable = False
+            self.changed.flags.writeable = False
+        else:
+            self.layers = share.layers
+            self.changed = share.changed
+
+
+class RangeWindow(RangeData):
+    """
+    Farthest points of an AntennaRange over the last seconds, from its history.
+    
+    origin is the range it was taken from. The epoch is the history's, and
+    every sector counts as changed at that epoch.
+    """
+    
+    def __init__(self, antenna_range, seconds, layers):
+        self.origin = antenna_range
+        self.seconds = seconds
+        self.num_sector = antenna_range.num_sector
+        self.num_layer = antenna_range.num_layer
+        self.center = antenna_range.center
+        self.center_set = antenna_range.center_set
+        self.epoch = antenna_range.history.epoch
+        self.points_seen = antenna_range.points_seen
+        self.points_rejected = antenna_range.points_rejected
+        self.density = None
+        self.layers = layers
+        self.changed = np.full(layers.shape[:2], self.epoch, dtype=np.int64)
+        self.layers.flags.writeable = False
+        self.changed.flags.writeable = False
+
+
+class RangeHistory():
+    """
+    Farthest points per time bucket, in a ring buffer.
+    
+    Memory is fixed: when time moves to a new bucket, the oldest one is
+    cleared and reused. Times are counted in buckets since the Unix epoch.
+    """
+    
+    def __init__(self, shape, buckets, bucket_seconds = HISTORY_BUCKET):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = np.full((buckets,) + shape, np.nan)
+        # Number of the time bucket held in each slot. -1 if never used.
+        self.numbers = np.full(buckets, -1, dtype=np.int64)
+        self.number = -1
+        self.current = self.buckets[0]
+        # Counts changes, like AntennaRange.epoch.
+        self.epoch = 0
+        
+    def advance(self, now = None):
+        """
+        Move to the bucket of time now (default: the current time).
+        
+        Returns True if that is a new bucket. Time never goes back: points
+        from an earlier time go in the current bucket.
+        """
+        if now is None:
+            now = time.time()
+        number = int(now // self.bucket_seconds)
+        if number <= self.number:
+            return False
+        
+        slot = number % len(self.buckets)
+        self.current = self.buckets[slot]
+        self.current[...] = np.nan
+        self.numbers[slot] = number
+        self.number = number
+        self.epoch += 1
+        return True
+        
+    def window(self, seconds):
+        """
+        Returns the farthest points of the buckets covering the last seconds.
+        
+        That is the current bucket, plus enough whole buckets before it to
+        cover seconds. The result is a new array shaped like AntennaRange.layers.
+        """
+        count = ceil(seconds / self.bucket_seconds) + 1
+        used = (self.numbers >= 0) & (self.numbers > self.number - count)
+        buckets = self.buckets[used]
+        if len(buckets) == 0:
+            return np.full(self.buckets.shape[1:], np.nan)
+        
+        # Max-reduce over the buckets. Empty sectors (NaN) never win.
+        best = np.nan_to_num(buckets[..., 2], nan=-1.0).argmax(axis=0)
+        return np.take_along_axis(buckets, best[np.newaxis, ..., np.newaxis], axis=0)[0]
+
+
+class RangeDensity():
+    """
+    Count of points per layer, sector and range bin.
+    
+    counts has the fixed shape (layers + 1, sectors, bins). Like the sector
+    maxima, every point counts in layer 0 and in its own layer.
+    """
+    
+    def __init__(self, shape, bin_km = DENSITY_BIN, max_km = DENSITY_MAX):
+        self.bin_km = bin_km
+        self.counts = np.zeros(shape + (ceil(max_km / bin_km),), dtype=np.uint32)
+        
+    def add(self, lay, s, r):
+        """
+        Count one point of layer lay, in sector s at range r.
+        """
+        b = min(int(r / self.bin_km), self.counts.shape[2] - 1)
+        self.counts[0, s, b] += 1
+        if lay:
+            self.counts[lay, s, b] += 1
+        
+    def add_many(self, lay, s, r):
+        """
+        Array version of add().
+        """
+        sectors, bins = self.counts.shape[1:]
+        cells = s * bins + np.minimum((r / self.bin_km).astype(np.intp), bins - 1)
+        own = lay > 0
+        cells = np.concatenate((cells, lay[own] * sectors * bins + cells[own]))
+        np.add.at(self.counts.reshape(-1), cells, 1)
+        
+    def percentile_ranges(self, percent, layer = 0):
+        """
+        Returns the range (km) within which percent of each sector's points were seen.
+        
+        Ranges are rounded up to whole bins. Sectors without points are NaN.
+        """
+        counts = self.counts[layer]
+        total = counts.sum(axis=1, dtype=np.int64)
+        within = counts.cumsum(axis=1, dtype=np.int64) * 100 >= total[:, np.newaxis] * percent
+        ranges = (within.argmax(axis=1) + 1) * float(self.bin_km)
+        ranges[total == 0] = np.nan
+        return ranges
+        
+    def copy(self):
+        """
+        Returns a read-only copy.
+        """
+        density = RangeDensity.__new__(RangeDensity)
+        density.bin_km = self.bin_km
+        density.counts = self.counts.copy()
+        density.counts.flags.writeable = False
+        return density
@@ -0,0 +1,191 @@
+# Copyright 2016 Travis Painter (travis.painter@gmail.com)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import py1090
+import antennarange
+import rangeoutput
+
+# Share of each transmission type in the generated traffic, roughly as seen from dump1090.
+MESSAGE_MIX = {1: 4, 2: 1, 3: 30, 4: 25, 5: 16, 6: 3, 7: 6, 8: 15}
+
+
+def generateLines(center, count, flights=300, radius=400, seed=0):
+    """
+    Generate deterministic BaseStation lines for aircraft flying around center.
+    
+    Every call with the same arguments returns the same lines. Aircraft fly
+    straight at constant speed and altitude, starting up to radius km from
+    center, and send MSG,1 to MSG,8 lines in the proportions of MESSAGE_MIX.
+    """
+    rnd = random.Random(seed)
+    km_per_lat = antennarange.KM_PER_DEGREE
+    km_per_lon = km_per_lat * math.cos(math.radians(center[0]))
+    
+    aircraft = []
+    for n in range(flights):
+        distance = radius * math.sqrt(rnd.random())
+        bearing = rnd.uniform(0, 2 * math.pi)
+        heading = rnd.uniform(0, 2 * math.pi)
+        speed = rnd.uniform(0.05, 0.25) # km per second
+        aircraft.append([
+            '{:06X}'.format(rnd.randrange(0x1000000)),
+            'FLT{:04d}'.format(n),
+            center[0] + distance * math.cos(bearing) / km_per_lat,
+            center[1] + distance * math.sin(bearing) / km_per_lon,
+            speed * math.cos(heading) / km_per_lat,
+            speed * math.sin(heading) / km_per_lon,
+            int(rnd.uniform(1000, 45000) / 25) * 25,
+            int(speed * 1943.8), # knots
+            int(math.degrees(heading)),
+            '{:04o}'.format(rnd.randrange(0o10000)),
+            ])
+    
+    types = [t for t, share in MESSAGE_MIX.items() for x in range(share)]
+    now = datetime(2016, 6, 1, 12, 0, 0)
+    lines = []
+    for n in range(count):
+        # About 1000 messages per second.
+        now += timedelta(milliseconds=1)
+        hexident, callsign, lat, lon, dlat, dlon, alt, speed, track, squawk = a = rnd.choice(aircraft)
+        a[2] += dlat
+        a[3] += dlon
+        
+        stamp = '{:%Y/%m/%d,%H:%M:%S}.{:03d}'.format(now, now.microsecond // 1000)
+        t = rnd.choice(types)
+        fields = ['MSG', str(t), '111', '11111', hexident, '111111', stamp, stamp]
+        if t == 1:
+            fields += [callsign, '', '', '', '', '', '', '', '', '', '', '']
+        elif t == 2:
+            fields += ['', '0', '0', '0', '{:.5f}'.format(lat), '{:.5f}'.format(lon), '', '', '', '', '', '-1']
+        elif t == 3:
+            fields += ['', str(alt), '', '', '{:.5f}'.format(lat), '{:.5f}'.format(lon), '', '', '0', '0', '0', '0']
+        elif t == 4:
+            fields += ['', '', str(speed), str(track), '', '', '0', '', '', '', '', '0']
+        elif t == 5:
+            fields += ['', str(alt), '', '', '', '', '', '', '0', '', '0', '0']
+        elif t == 6:
+            fields += ['', '', '', '', '', '', '', squawk, '0', '0', '0', '0']
+        elif t == 7:
+            fields += ['', str(alt), '', '', '', '', '', '', '', '', '', '0']
+        else:
+            fields += ['', '', '', '', '', '', '', '', '', '', '', '0']
+        lines.append(','.join(fields))
+    return lines
+
+
+def best(func, repeat):
+    """
+    Run func repeat times and return the fastest time in seconds.
+    
+    The fastest run is the one least disturbed by the rest of the system,
+    which makes it the most comparable between runs.
+    """
+    times = []
+    for n in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(name, seconds, count=None, unit=None):
+    """
+    Print one benchmark result.
+    """
+    if count is None:
+        print("{:<46} {:>12.2f} ms".format(name, seconds * 1000))
+    else:
+        print("{:<46} {:>12,.0f} {}/s".format(name, count / seconds, unit))
+
+
+def benchParsing(lines, repeat):
+    report("Message.from_string", best(lambda: [py1090.Message.from_string(l) for l in lines], repeat), len(lines), 'lines')
+    report("parse_position", best(lambda: [py1090.parse_position(l) for l in lines], repeat), len(lines), 'lines')
+    chunk = ''.join(l + '\n' for l in lines).encode('ascii')
+    report("parse_columns", best(lambda: py1090.parse_columns(chunk), repeat), len(lines), 'lines')
+
+
+def benchRange(center, points, repeat):
+    def scalar():
+        antenna_range = antennarange.AntennaRange(center, 720, 5)
+        for p in points:
+            antenna_range.add_point(p)
+    
+    def batched():
+        antenna_range = antennarange.AntennaRange(center, 720, 5)
+        antenna_range.add_points(points)
+    
+    def density():
+        antenna_range = antennarange.AntennaRange(center, 720, 5)
+        antenna_range.keep_density()
+        antenna_range.add_points(points)
+    
+    report("AntennaRange.add_point", best(scalar, repeat), len(points), 'points')
+    report("AntennaRange.add_points", best(batched, repeat), len(points), 'points')
+    report("AntennaRange.add_points with density", best(density, repeat), len(points), 'points')
+
+
+def benchExport(center, points, repeat):
+    for sectors in (360, 720, 1440):
+        for layers in (0, 5, 10):
+            antenna_range = antennarange.AntennaRange(center, sectors, layers)
+            antenna_range.add_points(points)
+            # The writers report what they do. Keep that out of the results.
+            with contextlib.redirect_stdout(io.StringIO()):
+                kml = best(lambda: rangeoutput.writeKml('bench', antenna_range), repeat)
+                js = best(lambda: rangeoutput.writeJson('bench', antenna_range), repeat)
+                # A writer that already wrote this range skips it until it changes.
+                writer = rangeoutput.KmlWriter('bench')
+                writer.write(antenna_range)
+                unchanged = best(lambda: writer.write(antenna_range), repeat)
+            report("writeKml {} sectors, {} layers".format(sectors, layers), kml)
+            report("writeJson {} sectors, {} layers".format(sectors, layers), js)
+            report("KmlWriter unchanged {} sectors, {} layers".format(sectors, layers), unchanged)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog = "ADSBbenchmark", 
+        description = "Measure parsing, range update and export speed on generated traffic.")
+    parser.add_argument('-l', '--lines', help="Number of lines to generate. Default 200000", type=int, default=200000)
+    parser.add_argument('-r', '--repeat', help="Runs of each benchmark. The fastest is reported. Default 5", type=int, default=5)
+    parser.add_argument('--lat', help="Latitude of the generated receiver. Default 45.0", type=float, default=45.0)
+    parser.add_argument('--lon', help="Longitude of the generated receiver. Default -90.0", type=float, default=-90.0)
+    args = parser.parse_args()
+    
+    center = (args.lat, args.lon)
+    lines = generateLines(center, args.lines)
+    points = list(py1090.iter_positions(lines))
+    print("{} lines, {} positions, best of {} runs".format(len(lines), len(points), args.repeat))
+    
+    benchParsing(lines, args.repeat)
+    benchRange(center, points, args.repeat)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            benchExport(center, points, args.repeat)
+        finally:
+            os.chdir(cwd)
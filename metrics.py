@@ -0,0 +1,150 @@
+# Copyright 2016 Travis Painter (travis.painter@gmail.com)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import json
+import time
+
+import rangeoutput
+
+
+class Histogram():
+    """
+    Durations in seconds, counted in fixed buckets.
+
+    Adding is a bisect and a few additions, so it can be used for every
+    chunk read. Percentiles are the upper bound of their bucket.
+    """
+
+    # Upper bounds of the buckets. The last bucket holds everything above.
+    BOUNDS = (0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent):
+        """
+        Returns the duration below which percent of the durations are, or 0 if there are none.
+        """
+        if not self.count:
+            return 0.0
+        wanted = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            seen += count
+            if seen >= wanted:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Returns the histogram as a dict for the stats file.
+        """
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'buckets': dict(zip([str(b) for b in self.BOUNDS] + ['inf'], self.counts)),
+            }
+
+
+class Metrics():
+    """
+    Counters and timings of collecting from one receiver.
+
+    Counters are plain attributes, added to once per chunk where possible.
+    Bytes, dropped batches and queue lengths are only counted without
+    Twisted. Positions, rejected points and sector updates are read from the
+    range itself. readLag is the time each batch waited between being
+    received and being handled, and process the time spent handling it.
+    When the lag grows or batches are dropped, the receiver is saturated.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.time()
+        self.lines = 0
+        self.bytes = 0
+        self.parseFailures = 0
+        self.dropped = 0
+        self.droppedBytes = 0
+        self.maxQueued = 0
+        self.readLag = Histogram()
+        self.process = Histogram()
+        self.export = Histogram()
+        # (time, lines, positions) of the last log line, for rates.
+        self.last = (self.start, 0, 0)
+
+    def summary(self, antenna_range):
+        """
+        Returns the counters and timings as a dict, with their rates since the start.
+        """
+        elapsed = max(time.time() - self.start, 1e-9)
+        return {
+            'name': self.name,
+            'uptime': elapsed,
+            'lines': self.lines,
+            'bytes': self.bytes,
+            'parse_failures': self.parseFailures,
+            'dropped': self.dropped,
+            'dropped_bytes': self.droppedBytes,
+            'max_queued': self.maxQueued,
+            'positions': antenna_range.points_seen,
+            'rejected': antenna_range.points_rejected,
+            'sector_updates': antenna_range.sector_updates,
+            'lines_per_second': self.lines / elapsed,
+            'positions_per_second': antenna_range.points_seen / elapsed,
+            'read_lag': self.readLag.summary(),
+            'process': self.process.summary(),
+            'export': self.export.summary(),
+            }
+
+    def logLine(self, antenna_range):
+        """
+        Returns a one line summary, with rates since the last log line.
+        """
+        now = time.time()
+        then, lines, positions = self.last
+        elapsed = max(now - then, 1e-9)
+        self.last = (now, self.lines, antenna_range.points_seen)
+        return ("Stats {}: {:.0f} lines/s, {:.0f} positions/s, {} parse failures, {} dropped, {} sector updates, "
+                "read lag p99 {:.1f} ms, export max {:.0f} ms").format(
+                    self.name, (self.lines - lines) / elapsed, (antenna_range.points_seen - positions) / elapsed,
+                    self.parseFailures, self.dropped, antenna_range.sector_updates,
+                    self.readLag.percentile(99) * 1000, self.export.max * 1000)
+
+    def write(self, summary):
+        """
+        Write a summary() to {name}_stats.json.
+        """
+        rangeoutput.atomicWrite(statsFilename(self.name), json.dumps(summary))
+
+
+def statsFilename(name):
+    """
+    Name of the stats file of a receiver.
+    """
+    return '{}_stats.json'.format(name)
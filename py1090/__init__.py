@@ -2,6 +2,7 @@
 This module provides a pythonic way to process ADS-B messages. It can work with any software that provides BaseStation-like output,
 for example `dump1090 <https://github.com/MalcolmRobb/dump1090>`_.
 """
-from .connection import Connection
-from .message import Message
-from .collection import FlightCollection
\ No newline at end of file
+from .connection import Connection, AsyncConnection, ThreadedConnection
+from .message import Message, parse_position, iter_positions, parse_columns
+from .collection import FlightCollection
+from .beast import BeastReader, AvrReader, PositionDecoder
\ No newline at end of file
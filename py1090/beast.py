@@ -0,0 +1,403 @@
+"""Readers for the raw Mode S feeds of dump1090: Beast binary (port 30005) and AVR text (port 30002).
+
+Raw feeds are much more compact than BaseStation text, but positions have to be decoded from the
+`CPR <https://mode-s.org/decode/content/ads-b/3-airborne-position.html>`_ encoded extended squitter (DF17)
+messages. Only airborne positions are decoded. ::
+
+	reader = BeastReader()
+	for chunk in chunks:
+		for lat, lon, alt in reader.positions(chunk):
+			print(lat, lon, alt)
+
+"""
+import bisect
+import math
+import time
+from collections import namedtuple
+
+_ESCAPE = 0x1a
+
+# Payload length of each Beast frame type: Mode A/C, Mode S short and Mode S long.
+_BEAST_LENGTHS = {0x31: 2, 0x32: 7, 0x33: 14}
+
+# Beast and AVR timestamps count at 12 MHz.
+_CLOCK = 12e6
+
+# Generator polynomial of the Mode S parity, x^24 + ... without the leading term.
+_CRC_POLYNOMIAL = 0xfff409
+
+def _crc_table():
+	table = []
+	for byte in range(256):
+		crc = byte << 16
+		for _ in range(8):
+			crc = ((crc << 1) ^ _CRC_POLYNOMIAL) if crc & 0x800000 else crc << 1
+		table.append(crc & 0xffffff)
+	return table
+
+_CRC_TABLE = _crc_table()
+
+# Number of latitude zones between the equator and a pole.
+_NZ = 15
+
+# Global decoding needs an even and an odd message no further apart than this, in seconds.
+PAIR_INTERVAL = 10.0
+"""Seconds within which an even and an odd message are combined into a globally decoded position."""
+
+# Local decoding is unambiguous as long as the aircraft moved less than half a zone (about 180 NM) since
+# its last known position. At airliner speeds that takes over 20 minutes.
+LOCAL_INTERVAL = 300.0
+"""Seconds for which the last position of an aircraft is used as reference for local decoding."""
+
+
+Frame = namedtuple('Frame', ['timestamp', 'signal', 'message'])
+Frame.__doc__ = """A single Mode S message of a raw feed.
+
+Attributes:
+	timestamp (int): 12 MHz receiver clock, 0 if the feed has none.
+	signal (int): signal level 0-255, 0 if the feed has none.
+	message (memoryview or bytes): the 7 or 14 bytes of the Mode S message, including parity.
+
+"""
+
+
+def crc(message):
+	"""Calculates the Mode S parity of a message.
+
+	For an extended squitter (DF17) the parity field is the CRC of the rest of the message, so the parity
+	of the whole message is 0 if it has been received without errors.
+
+	Args:
+		message (bytes-like): the message.
+
+	Returns:
+		int: the 24 bit parity.
+
+	"""
+	table = _CRC_TABLE
+	value = 0
+	for byte in message:
+		value = ((value << 8) & 0xffffff) ^ table[(value >> 16) ^ byte]
+	return value
+
+
+class BeastReader:
+	"""Splits a Beast binary feed into Mode S frames and decodes their positions.
+
+	Each frame is ``0x1a``, a type byte, a 6 byte timestamp, a signal byte and the message. A ``0x1a`` within
+	a frame is sent twice. Frames are cut from the data as :py:class:`memoryview` slices, so they are not
+	copied unless they contain such an escape. Data may be fed in chunks of any size: an incomplete frame at
+	the end of a chunk is completed by the next one.
+
+	Args:
+		decoder (PositionDecoder): keeps the state of the aircraft. A new one by default.
+
+	"""
+
+	def __init__(self, decoder=None):
+		self.decoder = decoder if decoder is not None else PositionDecoder()
+		self._pending = b''
+
+	def frames(self, data):
+		"""Yields the Mode S frames of the next chunk of data.
+
+		Mode A/C and other frame types are skipped, as is everything before the first ``0x1a``.
+
+		Args:
+			data (bytes-like): next chunk of the feed.
+
+		Yields:
+			Frame: each complete frame, in order.
+
+		"""
+		buffer = self._pending + bytes(data) if self._pending else data
+		view = memoryview(buffer)
+		find = buffer.find if hasattr(buffer, 'find') else bytes(view).find
+		end = len(view)
+		position = 0
+		consumed = 0
+
+		while True:
+			start = find(b'\x1a', position)
+			if start < 0 or start + 1 >= end:
+				consumed = end if start < 0 else start
+				break
+			kind = view[start + 1]
+			if kind == _ESCAPE:
+				# An escaped 0x1a outside a frame, after joining a feed midway.
+				position = consumed = start + 2
+				continue
+
+			length = _BEAST_LENGTHS.get(kind)
+			if length is None:
+				position = consumed = start + 1
+				continue
+
+			# timestamp, signal and message, without escapes.
+			size = 7 + length
+			body = view[start + 2:start + 2 + size]
+			if len(body) < size:
+				consumed = start
+				break
+			escapes = find(b'\x1a', start + 2, start + 2 + size)
+			if escapes < 0:
+				frame_end = start + 2 + size
+			else:
+				body, frame_end = self._unescape(view, start + 2, size)
+				if body is None:
+					# Incomplete, or a new frame starts within this one.
+					if frame_end is None:
+						consumed = start
+						break
+					position = consumed = frame_end
+					continue
+
+			position = consumed = frame_end
+			if kind != 0x31:
+				yield Frame(int.from_bytes(body[0:6], 'big'), body[6], body[7:])
+
+		self._pending = bytes(view[consumed:])
+
+	@staticmethod
+	def _unescape(view, start, size):
+		"""Copies size bytes of a frame starting at start, removing the doubled ``0x1a``.
+
+		Returns:
+			tuple: (body, end of the frame). The body is None if the frame is broken off by a new one, and the
+				end is None if the data ends before the frame does.
+		"""
+		body = bytearray()
+		position = start
+		end = len(view)
+		while len(body) < size:
+			if position >= end:
+				return None, None
+			byte = view[position]
+			if byte == _ESCAPE:
+				if position + 1 >= end:
+					return None, None
+				if view[position + 1] != _ESCAPE:
+					return None, position
+				position += 1
+			body.append(byte)
+			position += 1
+		return bytes(body), position
+
+	def positions(self, data, now=None):
+		"""Yields the positions decoded from the next chunk of data.
+
+		Args:
+			data (bytes-like): next chunk of the feed.
+			now (float): seconds since the epoch the chunk was received, for feeds without timestamps.
+				Default: the current time.
+
+		Yields:
+			tuple: (latitude, longitude, altitude), like :py:func:`py1090.parse_position`.
+
+		"""
+		now = time.time() if now is None else now
+		decode = self.decoder.decode
+		for frame in self.frames(data):
+			position = decode(frame.message, frame.timestamp / _CLOCK if frame.timestamp else now)
+			if position is not None:
+				yield position
+
+
+class AvrReader(BeastReader):
+	"""Splits an AVR text feed into Mode S frames and decodes their positions.
+
+	Each line is ``*``, the message in hex and ``;``. Lines starting with ``@`` have a 12 digit hex
+	timestamp before the message. Other lines are skipped.
+
+	Args:
+		decoder (PositionDecoder): keeps the state of the aircraft. A new one by default.
+
+	"""
+
+	def frames(self, data):
+		"""Yields the Mode S frames of the next chunk of data.
+
+		Args:
+			data (bytes-like): next chunk of the feed.
+
+		Yields:
+			Frame: each complete frame, in order. The message is a copy.
+
+		"""
+		buffer = self._pending + bytes(data)
+		lines = buffer.split(b'\n')
+		self._pending = lines.pop()
+
+		for line in lines:
+			line = line.strip()
+			if not line.endswith(b';'):
+				continue
+			try:
+				if line.startswith(b'*'):
+					timestamp = 0
+					message = bytes.fromhex(line[1:-1].decode('ascii'))
+				elif line.startswith(b'@'):
+					timestamp = int(line[1:13], 16)
+					message = bytes.fromhex(line[13:-1].decode('ascii'))
+				else:
+					continue
+			except ValueError:
+				continue
+			if len(message) in (7, 14):
+				yield Frame(timestamp, 0, message)
+
+
+class PositionDecoder:
+	"""Decodes the airborne positions of extended squitter (DF17) messages.
+
+	A position is sent as alternating even and odd CPR messages. The first position of an aircraft is found
+	globally, from an even and an odd message received within :py:data:`PAIR_INTERVAL`. After that, each
+	message is decoded locally, relative to the last position of the aircraft.
+
+	Messages with a wrong parity are dropped. Altitudes in Gillham code (rare, from old transponders) are not
+	decoded and given as None. Aircraft not heard from for :py:data:`LOCAL_INTERVAL` are forgotten, every
+	:py:data:`LOCAL_INTERVAL`, so the state stays bounded however long the feed runs.
+
+	Attributes:
+		messages (int): number of messages given to :py:meth:`decode`.
+		errors (int): number of position messages dropped for a wrong parity.
+
+	"""
+
+	def __init__(self):
+		# ICAO address -> [even (lat, lon, time), odd (lat, lon, time), last (lat, lon, time)]
+		self.aircraft = {}
+		self.messages = 0
+		self.errors = 0
+		# Time of the last forget().
+		self._forgotten = None
+
+	def decode(self, message, now):
+		"""Decodes the position of a Mode S message.
+
+		Args:
+			message (bytes-like): 14 byte Mode S message.
+			now (float): seconds the message was received, on any clock that is used for all messages.
+
+		Returns:
+			tuple: (latitude, longitude, altitude) if the message contains a position that could be decoded,
+				None otherwise.
+
+		"""
+		self.messages += 1
+		if len(message) != 14 or message[0] >> 3 != 17:
+			return None
+		type_code = message[4] >> 3
+		if not 9 <= type_code <= 18:
+			return None
+		if crc(message) != 0:
+			self.errors += 1
+			return None
+
+		if self._forgotten is None:
+			self._forgotten = now
+		elif abs(now - self._forgotten) > LOCAL_INTERVAL:
+			self.forget(now - LOCAL_INTERVAL)
+			self._forgotten = now
+
+		icao = (message[1] << 16) | (message[2] << 8) | message[3]
+		altitude = _decode_altitude(((message[5] << 4) | (message[6] >> 4)))
+		odd = (message[6] >> 2) & 1
+		raw = int.from_bytes(message[6:11], 'big')
+		lat_cpr = ((raw >> 17) & 0x1ffff) / 131072.0
+		lon_cpr = (raw & 0x1ffff) / 131072.0
+
+		state = self.aircraft.get(icao)
+		if state is None:
+			state = self.aircraft[icao] = [None, None, None]
+		state[odd] = (lat_cpr, lon_cpr, now)
+
+		position = None
+		last = state[2]
+		if last is not None and now - last[2] <= LOCAL_INTERVAL:
+			position = _local(lat_cpr, lon_cpr, odd, last[0], last[1])
+		else:
+			other = state[1 - odd]
+			if other is not None and abs(now - other[2]) <= PAIR_INTERVAL:
+				even, odd_cpr = state[0], state[1]
+				position = _global(even[0], even[1], odd_cpr[0], odd_cpr[1], odd)
+
+		if position is None:
+			return None
+		state[2] = (position[0], position[1], now)
+		return position[0], position[1], altitude
+
+	def forget(self, before):
+		"""Removes the state of aircraft that have not been heard from since before.
+
+		Args:
+			before (float): time, on the clock given to :py:meth:`decode`.
+
+		"""
+		for icao in [icao for icao, state in self.aircraft.items()
+					if max(s[2] for s in state if s is not None) < before]:
+			del self.aircraft[icao]
+
+
+def _decode_altitude(code):
+	"""Decodes the 12 bit altitude code of an airborne position, in feet. None for Gillham code."""
+	if not code & 0x10:
+		return None
+	# Remove the Q bit.
+	n = ((code & 0xfe0) >> 1) | (code & 0x0f)
+	return n * 25 - 1000
+
+def _nl_boundaries():
+	# Latitude where the number of longitude zones drops below n, for n = 59 down to 2.
+	a = 1 - math.cos(math.pi / (2 * _NZ))
+	return [math.degrees(math.acos(math.sqrt(a / (1 - math.cos(2 * math.pi / n))))) for n in range(4 * _NZ - 1, 1, -1)]
+
+_NL_BOUNDARIES = _nl_boundaries()
+
+def _nl(lat):
+	"""Number of longitude zones at a latitude."""
+	return 4 * _NZ - 1 - bisect.bisect_right(_NL_BOUNDARIES, abs(lat))
+
+def _global(lat_even, lon_even, lat_odd, lon_odd, odd):
+	"""Finds a position from an even and an odd CPR message. odd tells which of both is the newer one."""
+	dlat_even = 360.0 / (4 * _NZ)
+	dlat_odd = 360.0 / (4 * _NZ - 1)
+	j = math.floor(59 * lat_even - 60 * lat_odd + 0.5)
+	rlat_even = dlat_even * (j % 60 + lat_even)
+	rlat_odd = dlat_odd * (j % 59 + lat_odd)
+	if rlat_even >= 270:
+		rlat_even -= 360
+	if rlat_odd >= 270:
+		rlat_odd -= 360
+	if not -90 <= rlat_even <= 90 or not -90 <= rlat_odd <= 90:
+		return None
+
+	nl = _nl(rlat_even)
+	if nl != _nl(rlat_odd):
+		# Both are in different latitude zones. Wait for the next pair.
+		return None
+
+	lat = rlat_odd if odd else rlat_even
+	ni = max(nl - odd, 1)
+	m = math.floor(lon_even * (nl - 1) - lon_odd * nl + 0.5)
+	lon = (360.0 / ni) * (m % ni + (lon_odd if odd else lon_even))
+	if lon >= 180:
+		lon -= 360
+	return lat, lon
+
+def _local(lat_cpr, lon_cpr, odd, ref_lat, ref_lon):
+	"""Finds a position from a single CPR message, relative to a reference within half a zone."""
+	dlat = 360.0 / (4 * _NZ - odd)
+	j = math.floor(ref_lat / dlat) + math.floor(0.5 + (ref_lat % dlat) / dlat - lat_cpr)
+	lat = dlat * (j + lat_cpr)
+	if not -90 <= lat <= 90:
+		return None
+
+	dlon = 360.0 / max(_nl(lat) - odd, 1)
+	m = math.floor(ref_lon / dlon) + math.floor(0.5 + (ref_lon % dlon) / dlon - lon_cpr)
+	lon = dlon * (m + lon_cpr)
+	if lon >= 180:
+		lon -= 360
+	elif lon < -180:
+		lon += 360
+	return lat, lon
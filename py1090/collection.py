@@ -1,15 +1,36 @@
-from collections import namedtuple, defaultdict
+from collections import OrderedDict, defaultdict, deque
+import math
+import time
 from .message import Message
+from .helpers import EARTH_RADIUS, distance_between
 
 class FlightCollection:
 	"""A collection of :py:class:`FlightCollectionEntry`'s, stored by hexident.
 
 	It does not provide groundbreaking new features, but it's a helper that stores flights for easy querying.
 	An instance can be queried (``collection['xxxxx']``) and iterated through.
+
+	By default every message of every flight is kept forever. On a live feed, use the bounded mode: flights not heard
+	from for ``max_age`` seconds are evicted, and each flight only keeps its last ``max_messages`` messages.
+
+	Flights are indexed by their last position on a grid, and by the time they were last heard from, so
+	:py:meth:`within`, :py:meth:`in_bbox` and :py:meth:`seen_since` only look at the flights nearby or recent.
+
+	Args:
+		max_age (float): evict flights not heard from for this many seconds. None keeps them forever.
+		max_messages (int): messages kept per flight. None keeps all of them.
+		grid_size (float): size of the cells of the position index, in degrees.
+
 	"""
 
-	def __init__(self):
-		self._dictionary = defaultdict(FlightCollectionEntry)
+	def __init__(self, max_age=None, max_messages=None, grid_size=1.0):
+		self.max_age = max_age
+		self.max_messages = max_messages
+		self.grid_size = grid_size
+		# Ordered by the time each flight was last heard from, oldest first.
+		self._dictionary = OrderedDict()
+		# Hexidents of the flights whose last position is in each grid cell.
+		self._grid = defaultdict(set)
 
 	def __len__(self):
 		return len(self._dictionary)
@@ -23,16 +44,178 @@ class FlightCollection:
 	def __iter__(self):
 		return iter(self._dictionary.values())
 
-	def add(self, message):
+	def add(self, message, now=None):
 		"""Adds a message to this collection.
 
 		Args:
 			message (:py:class:`Message`): message to add
+			now (float): time the message was received, as returned by :py:func:`time.monotonic`. Defaults to the
+				current time. Only used in the bounded mode.
 
 		"""
 		if not isinstance(message, Message):
 			message = Message.from_string(message)
-		self._dictionary[message.hexident].append(message)
+
+		if now is None:
+			now = time.monotonic()
+
+		entry = self._dictionary.get(message.hexident)
+		if entry is None:
+			entry = FlightCollectionEntry(self.max_messages)
+			self._dictionary[message.hexident] = entry
+		else:
+			self._dictionary.move_to_end(message.hexident)
+		entry.append(message)
+		entry.last_seen = now
+		self._index(entry)
+
+		if self.max_age is not None:
+			self.evict(now)
+
+	def evict(self, now=None):
+		"""Removes the flights not heard from for ``max_age`` seconds.
+
+		Called by :py:meth:`add`, but also useful when the feed is quiet.
+
+		Args:
+			now (float): the current time, as returned by :py:func:`time.monotonic`.
+
+		Returns:
+			int: number of flights removed
+
+		"""
+		if self.max_age is None:
+			return 0
+		if now is None:
+			now = time.monotonic()
+
+		# Flights are ordered by last_seen, so stop at the first recent one.
+		evicted = 0
+		oldest = now - self.max_age
+		while self._dictionary:
+			hexident, entry = next(iter(self._dictionary.items()))
+			if entry.last_seen >= oldest:
+				break
+			del self._dictionary[hexident]
+			self._unindex(entry)
+			evicted += 1
+		return evicted
+
+	def seen_since(self, since):
+		"""Flights heard from at or after a time, most recent first.
+
+		Only the returned flights are visited.
+
+		Args:
+			since (float): time, as returned by :py:func:`time.monotonic` (or as passed to :py:meth:`add`).
+
+		Returns:
+			list: List of :py:class:`py1090.collection.FlightCollectionEntry`
+
+		"""
+		flights = []
+		for entry in reversed(self._dictionary.values()):
+			if entry.last_seen < since:
+				break
+			flights.append(entry)
+		return flights
+
+	def in_bbox(self, lat_min, lon_min, lat_max, lon_max):
+		"""Flights whose last position is inside a box.
+
+		A box crossing the 180th meridian has ``lon_min > lon_max``.
+
+		Args:
+			lat_min (float): southern edge
+			lon_min (float): western edge
+			lat_max (float): northern edge
+			lon_max (float): eastern edge
+
+		Returns:
+			list: List of :py:class:`py1090.collection.FlightCollectionEntry`
+
+		"""
+		flights = []
+		for entry in self._candidates(lat_min, lon_min, lat_max, lon_max):
+			lat, lon = entry.last_position
+			if lon_min <= lon_max:
+				inside = lon_min <= lon <= lon_max
+			else:
+				inside = lon >= lon_min or lon <= lon_max
+			if inside and lat_min <= lat <= lat_max:
+				flights.append(entry)
+		return flights
+
+	def within(self, lat, lon, distance):
+		"""Flights whose last position is within a distance of a location.
+
+		Args:
+			lat (float): latitude of the location
+			lon (float): longitude of the location
+			distance (float): distance in meters, see :py:func:`py1090.helpers.distance_between`
+
+		Returns:
+			list: List of :py:class:`py1090.collection.FlightCollectionEntry`
+
+		"""
+		# Box around the circle. Its longitude span grows toward the poles.
+		angle = distance / EARTH_RADIUS
+		dlat = math.degrees(angle)
+		lat_min, lat_max = lat - dlat, lat + dlat
+		if lat_min <= -90 or lat_max >= 90 or angle >= math.pi / 2:
+			lon_min, lon_max = -180, 180
+		else:
+			dlon = math.degrees(math.asin(min(1, math.sin(angle) / math.cos(math.radians(lat)))))
+			lon_min = (lon - dlon + 180) % 360 - 180
+			lon_max = (lon + dlon + 180) % 360 - 180
+
+		flights = []
+		for entry in self._candidates(lat_min, lon_min, lat_max, lon_max):
+			if distance_between(lat, lon, *entry.last_position) <= distance:
+				flights.append(entry)
+		return flights
+
+	def _candidates(self, lat_min, lon_min, lat_max, lon_max):
+		"""Yields the flights in the grid cells overlapping a box."""
+		rows = range(math.floor(lat_min / self.grid_size), math.floor(lat_max / self.grid_size) + 1)
+		if lon_min <= lon_max:
+			spans = [(lon_min, lon_max)]
+		else:
+			spans = [(lon_min, 180), (-180, lon_max)]
+		columns = set()
+		for west, east in spans:
+			columns.update(range(math.floor(west / self.grid_size), math.floor(east / self.grid_size) + 1))
+
+		if len(rows) * len(columns) > len(self._grid):
+			# Large box. Cheaper to go through the cells that have flights.
+			cells = [cell for cell in self._grid if cell[0] in rows and cell[1] in columns]
+		else:
+			cells = [(row, column) for row in rows for column in columns if (row, column) in self._grid]
+
+		for cell in cells:
+			for hexident in self._grid[cell]:
+				yield self._dictionary[hexident]
+
+	def _index(self, entry):
+		"""Moves a flight to the grid cell of its last position."""
+		lat, lon = entry.last_position
+		if lat is None:
+			return
+		cell = (math.floor(lat / self.grid_size), math.floor(lon / self.grid_size))
+		if cell != entry.cell:
+			self._unindex(entry)
+			self._grid[cell].add(entry.hexident)
+			entry.cell = cell
+
+	def _unindex(self, entry):
+		"""Removes a flight from the grid."""
+		if entry.cell is None:
+			return
+		hexidents = self._grid[entry.cell]
+		hexidents.discard(entry.hexident)
+		if not hexidents:
+			del self._grid[entry.cell]
+		entry.cell = None
 
 	def flights(self):
 		"""All stored flights.
@@ -60,14 +243,25 @@ class FlightCollectionEntry:
 	"""Entry of a :py:class:`FlightCollection`. Allows for easy querying flight data, since one single message does not contain all the data
 	information about a flight.
 
+	Args:
+		max_messages (int): only keep this many of the latest messages. None keeps all of them.
+
 	See Also:
 		:py:class:`Message`
 			For details about the accuracy of the positional information provided by this class.
 
 	"""
-	def __init__(self):
-		self.messages = []
+	def __init__(self, max_messages=None):
+		if max_messages is None:
+			self.messages = []
+		else:
+			self.messages = deque(maxlen=max_messages)
 		self.hexident = None
+		self.last_seen = None
+		# Cell of the FlightCollection's position index.
+		self.cell = None
+		self._last_position = (None, None)
+		self._last_altitude = None
 
 	def append(self, message):
 		"""Adds a message that should belong to this collection.
@@ -87,37 +281,39 @@ class FlightCollectionEntry:
 
 		if message.message_type == 'MSG':
 			self.messages.append(message)
+			if message.latitude and message.longitude:
+				self._last_position = (message.latitude, message.longitude)
+			if message.altitude:
+				self._last_altitude = message.altitude
 
 	@property
 	def last_position(self):
-		"""Finds the last known position of the flight (by iterating backwards through collected messages).
+		"""The last known position of the flight, kept up to date as messages are added.
+
+		Also known when the message holding it is no longer kept.
 
 		Returns:
 			tuple: a tuple of :py:class:`float` if the position was ever recorded, (None, None) otherwise.
 
 		"""
-		for message in reversed(self.messages):
-			if message.latitude and message.longitude:
-				return (message.latitude, message.longitude)
-		return None, None
+		return self._last_position
 
 	@property
 	def last_altitude(self):
-		"""Finds the last known altitude of the flight (by iterating backwards through collected messages).
+		"""The last known altitude of the flight, kept up to date as messages are added.
 
 		Returns:
 			float: the altitude in feet, None otherwise.
 
 			"""
-		for message in reversed(self.messages):
-			if message.altitude:
-				return message.altitude
-		return None
+		return self._last_altitude
 
 	@property
 	def path(self):
 		"""Reconstructs the flight path. Yields it as an iterator.
 
+		Only kept messages are part of the path.
+
 		Yields:
 			tuple: (lat, lon, alt) describing the latitude, longitude and altitude of a message
 
@@ -130,4 +326,3 @@ class FlightCollectionEntry:
 
 	def __iter__(self):
 		return iter(self.messages)
-
@@ -1,6 +1,10 @@
 import socket
 import select
 import io
+import asyncio
+import threading
+import time
+from collections import deque
 
 from .message import Message
 
@@ -29,20 +33,23 @@ class Connection(io.TextIOWrapper):
 		super().__init__(self._wrapper.buffer, encoding=self._wrapper.encoding, errors=self._wrapper.errors)
 
 	def __next__(self):
-		# make this iterator non-blocking for Ctrl+C
-		while not self.has_data():
+		# wait in short intervals instead of blocking, so Ctrl+C still works
+		while not self.has_data(0.5):
 			pass
 		return super().__next__()
 
 
-	def has_data(self):
+	def has_data(self, timeout=0):
 		"""Checks if the socket currently has data available for reading (using :py:func:`select.select`).
 
+		Args:
+			timeout (float): Seconds to wait for data. The default of 0 returns immediately.
+
 		Returns:
 			bool: True if there is data available for reading, False otherwise.
 
 		"""
-		rlist, _, _ = select.select([ self.socket ], [], [], 0)
+		rlist, _, _ = select.select([ self.socket ], [], [], timeout)
 		return len(rlist) > 0
 
 	def readmessage(self):
@@ -55,3 +62,260 @@ class Connection(io.TextIOWrapper):
 
 	def __del__(self):
 		self.socket.close()
+
+
+class AsyncConnection:
+	"""Asynchronous reader for BaseStation messages from a TCP server, based on :py:mod:`asyncio`.
+
+	The connection can be used as asynchronous contextmanager and iterator. Waiting for data uses no CPU: ::
+
+		async with AsyncConnection() as connection:
+			async for line in connection:
+				print(line)
+
+	Data is read in large chunks and split into lines in bulk. :py:meth:`readlines` returns a whole chunk at once,
+	which is cheaper than iterating line by line.
+
+	Args:
+		host(str): IP or hostname
+		port(int): Port number
+		read_size(int): Number of bytes to read from the socket at once.
+
+	Attributes:
+		bytes_read (int): Number of bytes read from the socket so far.
+
+	"""
+
+	def __init__(self, host="localhost", port=30003, read_size=256*1024):
+		self.host = host
+		self.port = port
+		self.read_size = read_size
+		self.reader = None
+		self.writer = None
+		self._lines = deque()
+		self._pending = ''
+		self.bytes_read = 0
+
+	async def connect(self):
+		"""Opens the connection. Called automatically when used as contextmanager, or by the first read."""
+		self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=self.read_size)
+		return self
+
+	async def readlines(self):
+		"""Reads the next chunk of complete lines from the connection.
+
+		Lines are returned without their line ending.
+
+		Returns:
+			list: the lines, or an empty list if the connection has been closed by the server.
+		"""
+		if self._lines:
+			lines = list(self._lines)
+			self._lines.clear()
+			return lines
+
+		if self.reader is None:
+			await self.connect()
+		while True:
+			data = await self.reader.read(self.read_size)
+			self.bytes_read += len(data)
+			if not data:
+				return []
+
+			lines = (self._pending + data.decode('ascii', 'replace')).split('\n')
+			self._pending = lines.pop()
+			if lines:
+				return [line.rstrip('\r') for line in lines]
+
+	async def read(self):
+		"""Reads the next chunk of raw data from the connection, for binary outputs like Beast.
+
+		Don't mix it with reading lines.
+
+		Returns:
+			bytes: the data, or an empty bytes object if the connection has been closed by the server.
+		"""
+		if self.reader is None:
+			await self.connect()
+		data = await self.reader.read(self.read_size)
+		self.bytes_read += len(data)
+		return data
+
+	async def readmessage(self):
+		"""Reads a single line from the connection, parses it via :py:meth:`Message.from_string` and returns it.
+
+		Returns:
+			Message: next unread message from socket
+		"""
+		return Message.from_string(await self.__anext__())
+
+	def __aiter__(self):
+		return self
+
+	async def __anext__(self):
+		if not self._lines:
+			self._lines.extend(await self.readlines())
+			if not self._lines:
+				raise StopAsyncIteration
+		return self._lines.popleft()
+
+	async def __aenter__(self):
+		return await self.connect()
+
+	async def __aexit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		"""Closes the connection."""
+		if self.writer is not None:
+			self.writer.close()
+			self.writer = None
+
+
+class ThreadedConnection(AsyncConnection):
+	"""Asynchronous reader like :py:class:`AsyncConnection`, that receives on a thread of its own.
+
+	The thread drains the socket into a bounded queue, also while the consumer is busy with the previous data,
+	so the kernel buffer does not overflow during a slow step. Received data is split into lines on the thread,
+	and queued as batches of complete lines (or as raw chunks, for binary outputs). ::
+
+		async with ThreadedConnection(overflow='drop') as connection:
+			while True:
+				lines = await connection.readlines()
+
+	When the queue is full, the thread waits until there is room again (``'block'``, the default), which slows
+	down the server through TCP, or the oldest batch is dropped to make room (``'drop'``).
+
+	Args:
+		host(str): IP or hostname
+		port(int): Port number
+		read_size(int): Number of bytes to receive from the socket at once.
+		max_batches(int): Number of batches the queue holds.
+		overflow(str): ``'block'`` or ``'drop'``, what happens when the queue is full.
+		raw(bool): Queue the received chunks as they are, for :py:meth:`read`, instead of lines.
+
+	Attributes:
+		bytes_read (int): Number of bytes received from the socket so far.
+		batches_dropped (int): Number of batches dropped because the queue was full.
+		bytes_dropped (int): Number of bytes in the dropped batches.
+		max_queued (int): Largest number of batches waiting in the queue so far.
+		last_delay (float): Seconds the last batch read waited in the queue.
+
+	"""
+
+	def __init__(self, host="localhost", port=30003, read_size=256*1024, max_batches=64, overflow='block', raw=False):
+		if overflow not in ('block', 'drop'):
+			raise ValueError("overflow must be 'block' or 'drop', not {!r}".format(overflow))
+		super().__init__(host, port, read_size)
+		self.max_batches = max_batches
+		self.overflow = overflow
+		self.raw = raw
+		self.batches_dropped = 0
+		self.bytes_dropped = 0
+		self.max_queued = 0
+		self.last_delay = 0.0
+		self.socket = None
+		self._loop = None
+		self._thread = None
+		# (batch, size in bytes, time received), shared with the receiving thread.
+		self._batches = deque()
+		self._condition = threading.Condition()
+		self._available = None
+
+	async def connect(self):
+		"""Opens the connection and starts receiving. Called automatically when used as contextmanager, or by the first
+		read."""
+		self._loop = asyncio.get_running_loop()
+		self._available = asyncio.Event()
+		self.socket = await self._loop.run_in_executor(None, socket.create_connection, (self.host, self.port))
+		self._thread = threading.Thread(target=self._receive, args=(self.socket,), daemon=True)
+		self._thread.start()
+		return self
+
+	def _receive(self, sock):
+		pending = b''
+		while True:
+			try:
+				data = sock.recv(self.read_size)
+			except OSError:
+				data = b''
+			self.bytes_read += len(data)
+
+			if not data:
+				batch = []
+			elif self.raw:
+				batch = data
+			else:
+				end = data.rfind(b'\n') + 1
+				if not end:
+					pending += data
+					continue
+				text = (pending + data[:end]).decode('ascii', 'replace')
+				pending = data[end:]
+				batch = [line.rstrip('\r') for line in text.split('\n')[:-1]]
+
+			with self._condition:
+				if data and self.overflow == 'drop':
+					if len(self._batches) >= self.max_batches:
+						_, dropped, _ = self._batches.popleft()
+						self.batches_dropped += 1
+						self.bytes_dropped += dropped
+				else:
+					# The end of the data is never dropped.
+					while len(self._batches) >= self.max_batches and self.socket is not None:
+						self._condition.wait(0.5)
+				self._batches.append((batch, len(data), time.monotonic()))
+				self.max_queued = max(self.max_queued, len(self._batches))
+			try:
+				self._loop.call_soon_threadsafe(self._available.set)
+			except RuntimeError:
+				# The event loop is closed.
+				return
+			if not data:
+				return
+
+	async def _next(self):
+		if self._thread is None:
+			await self.connect()
+		while True:
+			with self._condition:
+				if self._batches:
+					batch, _, received = self._batches.popleft()
+					self._condition.notify()
+					break
+				self._available.clear()
+			await self._available.wait()
+		self.last_delay = time.monotonic() - received
+		return batch
+
+	async def readlines(self):
+		"""Reads the next batch of complete lines from the queue.
+
+		Lines are returned without their line ending.
+
+		Returns:
+			list: the lines, or an empty list if the connection has been closed by the server.
+		"""
+		if self._lines:
+			lines = list(self._lines)
+			self._lines.clear()
+			return lines
+		return await self._next()
+
+	async def read(self):
+		"""Reads the next chunk of raw data from the queue. Needs ``raw=True``.
+
+		Returns:
+			bytes: the data, or an empty bytes object if the connection has been closed by the server.
+		"""
+		return bytes(await self._next())
+
+	def close(self):
+		"""Closes the connection. The receiving thread ends."""
+		if self.socket is not None:
+			sock, self.socket = self.socket, None
+			try:
+				sock.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+			sock.close()
@@ -1,5 +1,11 @@
 import math
 
+try:
+	import numpy as np
+except ImportError:
+	# Optional. Without it, only floats are accepted.
+	np = None
+
 EARTH_RADIUS = 6371008.7714 # m
 r"""The average earth radius :math:`R_0`. It is defined as the mean radius of the semi-axes.
 The values are taken from the WGS 84 (World Geodetic System 1984) ellipsoid
@@ -31,25 +37,14 @@ def distance_between(lat1, lon1, lat2, lon2):
 		lat2 (float): :math:`\phi_2`, the latitude of the target location
 		lon2 (float): :math:`\lambda_2`, the longitude of the target location
 
+	The target location may also be given as NumPy arrays. See :py:class:`ReferencePoint` to measure from one location
+	many times.
+
 	Returns:
 		float: the distance in meters.
 
 	"""
-	lambda1 = math.radians(lon1)
-	lambda2 = math.radians(lon2)
-
-	phi1 = math.radians(lat1)
-	phi2 = math.radians(lat2)
-
-	dphi = phi2-phi1
-	dlambda = lambda2-lambda1
-
-	a = math.pow(math.sin(dphi/2), 2) + math.cos(phi1)*math.cos(phi2)*math.pow(math.sin(dlambda/2), 2)
-	dsigma = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
-
-	distance = EARTH_RADIUS * dsigma
-
-	return distance
+	return ReferencePoint(lat1, lon1).distance_to(lat2, lon2)
 
 def bearing_between(lat1, lon1, lat2, lon2):
 	r"""Calculates the bearing angle between two locations, in radians.
@@ -58,7 +53,9 @@ def bearing_between(lat1, lon1, lat2, lon2):
 
 	.. math::
 
-		\mathrm{atan2}(\sin(\lambda_2 - \lambda_1) \cos(\phi_1), \cos(\phi_2) \sin(\phi_1) - \sin(\phi_2) \cos(\phi_2) \cos(\lambda_2 - \lambda_1))
+		\mathrm{atan2}(\sin(\lambda_2 - \lambda_1) \cos(\phi_2), \cos(\phi_1) \sin(\phi_2) - \sin(\phi_1) \cos(\phi_2) \cos(\lambda_2 - \lambda_1))
+
+	The target location may also be given as NumPy arrays.
 
 	Args:
 		lat1 (float): :math:`\phi_1`, the latitude of the reference location
@@ -67,22 +64,113 @@ def bearing_between(lat1, lon1, lat2, lon2):
 		lon2 (float): :math:`\lambda_2`, the longitude of the target location
 
 	Returns:
-		float: the bearing angle in radians, between :math:`-\pi` and :math:`\pi`.
+		float: the bearing angle in radians, between :math:`-\pi` and :math:`\pi`, clockwise from north.
 
 	"""
-	lambda1 = math.radians(lon1)
-	lambda2 = math.radians(lon2)
+	return ReferencePoint(lat1, lon1).bearing_to(lat2, lon2)
+
+def _is_array(value):
+	# Checked for every call, so keep it cheap. NumPy scalars are floats.
+	return not isinstance(value, (float, int)) and np is not None
+
+class ReferencePoint:
+	r"""A fixed location to measure distances and bearings from, or to find destinations from.
 
-	phi1 = math.radians(lat1)
-	phi2 = math.radians(lat2)
+	Its trigonometric values are computed once, so measuring many locations from the same point is cheap. Every method
+	accepts floats, or NumPy arrays (lists are converted) of any shape, which are computed in one go. ::
 
-	dphi = phi2-phi1
-	dlambda = lambda2-lambda1
+		>>> antenna = ReferencePoint(50.0, 6.0)
+		>>> antenna.distance_to(numpy.array([50.5, 51.0]), numpy.array([6.0, 7.0]))
+		array([ 55597.53..., 131780.65...])
 
-	bearing = math.atan2(math.sin(dlambda)*math.cos(phi1), \
-		math.cos(phi2)*math.sin(phi1)-math.sin(phi2)*math.cos(phi1)*math.cos(dlambda))
+	Args:
+		lat (float): :math:`\phi_1`, the latitude of the reference location
+		lon (float): :math:`\lambda_1`, the longitude of the reference location
+		radius (float): the earth radius, which sets the unit of distances. Defaults to
+			:py:data:`py1090.helpers.EARTH_RADIUS` in meters.
+
+	"""
 
-	return bearing
+	def __init__(self, lat, lon, radius=EARTH_RADIUS):
+		self.latitude = lat
+		self.longitude = lon
+		self.radius = radius
+		self._phi = math.radians(lat)
+		self._lambda = math.radians(lon)
+		self._sin_phi = math.sin(self._phi)
+		self._cos_phi = math.cos(self._phi)
+
+	def distance_to(self, lat, lon):
+		"""Calculates the distance to a location using the Haversine formula, like :py:func:`distance_between`.
+
+		Args:
+			lat (float): latitude of the target location, or an array of them
+			lon (float): longitude of the target location, or an array of them
+
+		Returns:
+			float: the distance in the unit of the radius (meters by default), or an array of them.
+
+		"""
+		if _is_array(lat) or _is_array(lon):
+			phi2 = np.radians(lat)
+			dlambda = np.radians(lon) - self._lambda
+			a = np.sin((phi2 - self._phi)/2)**2 + self._cos_phi*np.cos(phi2)*np.sin(dlambda/2)**2
+			return 2*np.arcsin(np.sqrt(a)) * self.radius
+
+		phi2 = math.radians(lat)
+		dlambda = math.radians(lon) - self._lambda
+		a = math.sin((phi2 - self._phi)/2)**2 + self._cos_phi*math.cos(phi2)*math.sin(dlambda/2)**2
+		return 2*math.asin(math.sqrt(a)) * self.radius
+
+	def bearing_to(self, lat, lon):
+		r"""Calculates the initial bearing to a location, like :py:func:`bearing_between`.
+
+		Args:
+			lat (float): latitude of the target location, or an array of them
+			lon (float): longitude of the target location, or an array of them
+
+		Returns:
+			float: the bearing angle in radians, between :math:`-\pi` and :math:`\pi`, clockwise from north, or an
+				array of them.
+
+		"""
+		if _is_array(lat) or _is_array(lon):
+			phi2 = np.radians(lat)
+			dlambda = np.radians(lon) - self._lambda
+			cos_phi2 = np.cos(phi2)
+			return np.arctan2(np.sin(dlambda)*cos_phi2,
+				self._cos_phi*np.sin(phi2) - self._sin_phi*cos_phi2*np.cos(dlambda))
+
+		phi2 = math.radians(lat)
+		dlambda = math.radians(lon) - self._lambda
+		cos_phi2 = math.cos(phi2)
+		return math.atan2(math.sin(dlambda)*cos_phi2,
+			self._cos_phi*math.sin(phi2) - self._sin_phi*cos_phi2*math.cos(dlambda))
+
+	def destination(self, bearing, distance):
+		"""Calculates the location reached by going a distance along a great circle, with an initial bearing.
+
+		Args:
+			bearing (float): initial bearing in radians, clockwise from north, or an array of them
+			distance (float): distance in the unit of the radius (meters by default), or an array of them
+
+		Returns:
+			tuple: (latitude, longitude) in degrees, the longitude between -180 and 180. Arrays if an array was given.
+
+		"""
+		if _is_array(bearing) or _is_array(distance):
+			sin, cos, asin, atan2, degrees = np.sin, np.cos, np.arcsin, np.arctan2, np.degrees
+			bearing = np.asarray(bearing, dtype=float)
+			distance = np.asarray(distance, dtype=float)
+		else:
+			sin, cos, asin, atan2, degrees = math.sin, math.cos, math.asin, math.atan2, math.degrees
+
+		sigma = distance / self.radius
+		sin_sigma = sin(sigma)
+		cos_sigma = cos(sigma)
+		phi2 = asin(self._sin_phi*cos_sigma + self._cos_phi*sin_sigma*cos(bearing))
+		lambda2 = self._lambda + atan2(sin(bearing)*sin_sigma*self._cos_phi, cos_sigma - self._sin_phi*sin(phi2))
+		return degrees(phi2), (degrees(lambda2) + 540) % 360 - 180
 
 
 def knots_to_kmh(knots):
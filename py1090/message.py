@@ -1,15 +1,36 @@
 #from enum import Enum
+from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache
+
+try:
+	import numpy as np
+except ImportError:
+	# Optional. Only needed for parse_columns.
+	np = None
 
 # http://www.homepages.mcb.net/bones/SBS/Article/Barebones42_Socket_Data.htm
+@lru_cache(maxsize=16)
+def _parse_date(datestr):
+	# Nearly every message of a feed has the same date.
+	return datetime.strptime(datestr, '%Y/%m/%d')
+
 def _parse_datetime(datestr, timestr):
-	date = datetime.strptime(datestr, '%Y/%m/%d')
+	date = _parse_date(datestr)
+
+	# Fast path for the usual HH:MM:SS.mmm
+	if len(timestr) == 12 and timestr[2] == ':' and timestr[5] == ':' and timestr[8] == '.':
+		try:
+			return date.replace(hour=int(timestr[0:2]), minute=int(timestr[3:5]), second=int(timestr[6:8]),
+				microsecond=int(timestr[9:12])*1000)
+		except ValueError:
+			pass
 
 	timestr, separator, millisstr = timestr.rpartition('.')
 	time = datetime.strptime(timestr, '%H:%M:%S')
 
 	seconds = float(separator + millisstr)
-	time = time.replace(microsecond=int(seconds*1000000))
+	time = time.replace(microsecond=int(round(seconds*1000000)))
 
 	return datetime.combine(date.date(), time.time())
 
@@ -36,6 +57,34 @@ def _dump_or_none(value, func=str):
 	else:
 		return func(value)
 
+# Marks a lazy field that has not been decoded yet.
+_UNSET = object()
+
+class _LazyField:
+	"""Attribute of a :py:class:`Message` that is only decoded from the retained line when first read.
+
+	The value is kept in the slot of the same name with a leading underscore.
+	"""
+
+	def __set_name__(self, owner, name):
+		self.slot = '_' + name
+
+	def __get__(self, message, owner=None):
+		if message is None:
+			return self
+		value = getattr(message, self.slot)
+		if value is _UNSET:
+			message._decode()
+			value = getattr(message, self.slot)
+		return value
+
+	def __set__(self, message, value):
+		setattr(message, self.slot, value)
+
+# Fields decoded on first access, rather than by Message.parse_string.
+_LAZY_FIELDS = ('session_id', 'aircraft_id', 'flight_id', 'generation_time', 'record_time', 'callsign',
+	'ground_speed', 'track', 'vertical_rate', 'squawk', 'squawk_alert', 'emergency', 'spi', 'on_ground')
+
 class Message:
 	"""Abstract representation of the information contained in a BaseStation line.
 
@@ -129,33 +178,44 @@ class Message:
 		spi (bool): Special Purpose identification. Flag to indicate transponder ident has been activated.
 
 		on_ground (bool): Flag to indicate ground squat switch is active.
+
+	The type, hexident, altitude and position are decoded by :py:meth:`parse_string`. The other fields are only decoded
+	from the retained line when one of them is first read, which skips the slow time parsing for most uses.
 	"""
 
+	__slots__ = ('message_type', 'transmission_type', 'hexident', 'altitude', 'latitude', 'longitude', '_line') + \
+		tuple('_' + name for name in _LAZY_FIELDS)
+
+	session_id = _LazyField()
+	aircraft_id = _LazyField()
+	flight_id = _LazyField()
+	generation_time = _LazyField()
+	record_time = _LazyField()
+	callsign = _LazyField()
+	ground_speed = _LazyField()
+	track = _LazyField()
+	vertical_rate = _LazyField()
+	squawk = _LazyField()
+	squawk_alert = _LazyField()
+	emergency = _LazyField()
+	spi = _LazyField()
+	on_ground = _LazyField()
+
 	def __init__(self):
 		self.message_type = None
 		self.transmission_type = None
-		self.session_id = None
-		self.aircraft_id = None
 		self.hexident = None
-		self.flight_id = None
-		self.generation_time = None
-		self.record_time = None
-		self.callsign = None
 		self.altitude = None
-		self.ground_speed = None
-		self.track = None
 		self.latitude = None
 		self.longitude = None
-		self.vertical_rate = None
-		self.squawk = None
-		self.squawk_alert = None
-		self.emergency = None
-		self.spi = None
-		self.on_ground = None
+		self._line = None
+		for name in _LAZY_FIELDS:
+			setattr(self, '_' + name, None)
 
 
 	def parse_string(self, string):
-		parts = string.strip().split(',')
+		line = string.strip()
+		parts = line.split(',')
 
 		if parts[0]:
 			self.message_type = parts[0].upper()
@@ -163,67 +223,99 @@ class Message:
 		if parts[1]:
 			self.transmission_type = int(parts[1])
 
+		if parts[4]:
+			self.hexident = parts[4].upper()
+
+		if self.message_type == 'MSG':
+			if parts[11]:
+				self.altitude = int(parts[11])
+
+			# This is a workaround for a bug for rtl1090 output.
+			# For subtype 7, only 21 fields are sent, and only altitude and on_ground is set.
+			if not (self.transmission_type == 7 and len(parts) == 21):
+				if parts[14]:
+					self.latitude = float(parts[14])
+
+				if parts[15]:
+					self.longitude = float(parts[15])
+
+		# Everything else is decoded from the line when first read.
+		self._line = line
+		for name in _LAZY_FIELDS:
+			setattr(self, '_' + name, _UNSET)
+
+	def _decode(self):
+		"""Decodes the lazy fields that were not set since parsing, from the retained line, and drops the line.
+
+		If a field can't be decoded, the error is raised and nothing changes, so every later read raises it again.
+		"""
+		parts = self._line.split(',')
+		values = dict.fromkeys(_LAZY_FIELDS)
+
 		if parts[2] and parts[2] != '111':
-			self.session_id = int(parts[2])
+			values['session_id'] = int(parts[2])
 
 		if parts[3] and parts[3] != '11111':
-			self.aircraft_id = int(parts[3])
-
-		if parts[4]:
-			self.hexident = parts[4].upper()
+			values['aircraft_id'] = int(parts[3])
 
 		if parts[5] and parts[5] != '111111':
-			self.flight_id = parts[5].upper()
+			values['flight_id'] = parts[5].upper()
 
 		if len(parts[6]) > 0 and len(parts[7]) > 0:
-			self.generation_time = _parse_datetime(parts[6], parts[7])
+			values['generation_time'] = _parse_datetime(parts[6], parts[7])
 
-		if len(parts[8]) > 0 and len(parts[8]) > 0:
-			self.record_time = _parse_datetime(parts[8], parts[9])
+		if len(parts[8]) > 0 and len(parts[9]) > 0:
+			values['record_time'] = _parse_datetime(parts[8], parts[9])
 
 		if len(parts) > 10 and parts[10]:
-			self.callsign = parts[10].upper()
+			values['callsign'] = parts[10].upper()
 
 		if self.message_type == 'MSG':
-			if parts[11]:
-				self.altitude = int(parts[11])
-
 			# This is a workaround for a bug for rtl1090 output.
 			# For subtype 7, only 21 fields are sent, and only altitude and on_ground is set.
 			if self.transmission_type == 7 and len(parts) == 21:
 				if parts[-1]:
-					self.on_ground = _parse_bool(parts[-1])
-				return
+					values['on_ground'] = _parse_bool(parts[-1])
+
+			else:
+				if parts[12]:
+					values['ground_speed'] = float(parts[12])
 
-			if parts[12]:
-				self.ground_speed = float(parts[12])
+				if parts[13]:
+					values['track'] = float(parts[13])
 
-			if parts[13]:
-				self.track = float(parts[13])
+				if parts[16]:
+					values['vertical_rate'] = int(parts[16])
 
-			if parts[14]:
-				self.latitude = float(parts[14])
+				if parts[17]:
+					values['squawk'] = int(parts[17])
 
-			if parts[15]:
-				self.longitude = float(parts[15])
+				if parts[18]:
+					values['squawk_alert'] = _parse_bool(parts[18])
 
-			if parts[16]:
-				self.vertical_rate = int(parts[16])
+				if parts[19]:
+					values['emergency'] = _parse_bool(parts[19])
 
-			if parts[17]:
-				self.squawk = int(parts[17])
+				if parts[20]:
+					values['spi'] = _parse_bool(parts[20])
 
-			if parts[18]:
-				self.squawk_alert = _parse_bool(parts[18])
+				if parts[21]:
+					values['on_ground'] = _parse_bool(parts[21])
 
-			if parts[19]:
-				self.emergency = _parse_bool(parts[19])
+		for name, value in values.items():
+			if getattr(self, '_' + name) is _UNSET:
+				setattr(self, '_' + name, value)
+		self._line = None
 
-			if parts[20]:
-				self.spi = _parse_bool(parts[20])
+	def __getstate__(self):
+		# The marker of undecoded fields can't be copied or pickled. Decode them first.
+		if self._line is not None:
+			self._decode()
+		return {slot: getattr(self, slot) for slot in self.__slots__}
 
-			if parts[21]:
-				self.on_ground = _parse_bool(parts[21])
+	def __setstate__(self, state):
+		for slot, value in state.items():
+			setattr(self, slot, value)
 
 
 	def to_string(self):
@@ -278,3 +370,275 @@ class Message:
 		"""
 		for item in iterator:
 			yield Message.from_string(item)
+
+# Transmission types which carry a position: 2 (surface) and 3 (airborne).
+_POSITION_PREFIXES = ('MSG,3,', 'MSG,2,')
+
+def parse_position(string, strict=False):
+	"""Extracts only the position from a BaseStation line, without building a :py:class:`Message`.
+
+	This is a fast path for consumers that only need the aircraft position. Lines that are not position
+	transmission messages (MSG,2 or MSG,3) are rejected after a prefix check, without splitting them. ::
+
+		>>> parse_position('MSG,3,111,11111,3C49CC,111111,2015/05/01,17:06:55.370,2015/05/01,17:06:55.326,,24400,,,50.65931,6.67709,,,,,,0')
+		(50.65931, 6.67709, 24400)
+
+	Args:
+		string (str): BaseStation line to parse.
+		strict (bool): Raise for position messages that can't be parsed, instead of returning None.
+
+	Returns:
+		tuple: (latitude, longitude, altitude) if the line contains a position, None otherwise. The altitude is None
+			if the line did not contain it.
+
+	Raises:
+		ValueError: with strict, if the line is a position message that is cut short or has fields that aren't
+			numbers. Position messages without a position are not an error.
+
+	"""
+	if not string.startswith(_POSITION_PREFIXES):
+		return None
+
+	parts = string.split(',', 16)
+	if len(parts) < 16:
+		if strict:
+			raise ValueError("Position message cut short: {!r}".format(string))
+		return None
+	if not parts[14] or not parts[15]:
+		return None
+
+	try:
+		latitude = float(parts[14])
+		longitude = float(parts[15])
+		altitude = int(parts[11]) if parts[11] else None
+	except ValueError:
+		if strict:
+			raise
+		return None
+
+	return (latitude, longitude, altitude)
+
+def iter_positions(iterator):
+	"""Iterates through an iterator of lines and yields the position of each line that has one, like
+	:py:meth:`Message.iter_messages` but using :py:func:`parse_position`. ::
+
+		for latitude, longitude, altitude in iter_positions(file):
+			print(latitude, longitude)
+
+	:param iterable iterator:
+	"""
+	for item in iterator:
+		position = parse_position(item)
+		if position is not None:
+			yield position
+
+# Fields of a BaseStation line, numbered from 0, used by parse_columns.
+_FIELDS = 22
+# Widest text accepted for a number, and for a latitude or longitude.
+_NUMBER_WIDTH = 8
+_COORDINATE_WIDTH = 12
+
+if np is not None:
+	# Value of each hexadecimal digit, 16 for other characters.
+	_HEX_VALUES = np.full(256, 16, dtype=np.uint8)
+	_HEX_VALUES[np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)] = np.arange(16)
+	_HEX_VALUES[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+	_POWERS_OF_TEN = 10.0 ** np.arange(16)
+
+MessageColumns = namedtuple('MessageColumns', ('hexident', 'transmission_type', 'altitude', 'latitude', 'longitude',
+	'timestamp', 'valid'))
+"""Columns of the messages in a chunk, as returned by :py:func:`parse_columns`. Each is a NumPy array with one entry per line.
+
+Attributes:
+	hexident (numpy.ndarray): uint32, the hexident as a number, 0 if invalid.
+	transmission_type (numpy.ndarray): uint8, the transmission type (1-8), 0 if missing.
+	altitude (numpy.ndarray): float64, the altitude in feet, NaN if missing.
+	latitude (numpy.ndarray): float64, NaN if missing.
+	longitude (numpy.ndarray): float64, NaN if missing.
+	timestamp (numpy.ndarray): float64, the generation time as seconds since the Unix epoch, NaN if missing. BaseStation
+		times carry no time zone, so they are taken as UTC.
+	valid (numpy.ndarray): bool, True for transmission messages (MSG) with a transmission type. The hexident may still
+		be invalid, like the ``~`` addresses dump1090-fa gives aircraft without an ICAO address.
+"""
+
+def parse_columns(chunk):
+	"""Parses a chunk of BaseStation lines into columns of NumPy arrays, without creating an object per line.
+
+	This is the bulk counterpart of :py:meth:`Message.from_string` for large logs or busy feeds. Only the hexident,
+	transmission type, altitude, position and generation time are decoded. Lines may end in ``\\n`` or ``\\r\\n``, and
+	the last line needs no line end, so split chunks after a line end. Empty lines are skipped. ::
+
+		columns = parse_columns(data)
+		positions = columns.valid & ~numpy.isnan(columns.latitude) & ~numpy.isnan(columns.longitude)
+		print(columns.latitude[positions], columns.longitude[positions])
+
+	Needs NumPy.
+
+	Args:
+		chunk (bytes): ASCII lines in the BaseStation format.
+
+	Returns:
+		MessageColumns: the columns of the non-empty lines, in order.
+
+	"""
+	if np is None:
+		raise ImportError("parse_columns() needs NumPy.")
+
+	buf = np.frombuffer(chunk, dtype=np.uint8)
+
+	# Line boundaries. ends are exclusive and exclude the line end.
+	newlines = np.flatnonzero(buf == ord('\n'))
+	starts = np.concatenate(([0], newlines + 1))
+	ends = np.concatenate((newlines, [len(buf)]))
+	carriage = ends > starts
+	carriage[carriage] = buf[ends[carriage] - 1] == ord('\r')
+	ends[carriage] -= 1
+	nonempty = ends > starts
+	starts = starts[nonempty]
+	ends = ends[nonempty]
+	lines = len(starts)
+
+	# Position of every comma within its line. Missing commas are at the end of the line.
+	commas = np.flatnonzero(buf == ord(','))
+	first = np.searchsorted(commas, starts)
+	count = np.searchsorted(commas, ends) - first
+	separators = np.empty((lines, _FIELDS), dtype=np.intp)
+	separators[:, -1] = ends
+	if lines and (count == _FIELDS - 1).all() and first[-1] + count[-1] == len(commas):
+		# Usual case: every line has all the fields, and there are no commas between lines.
+		separators[:, :-1] = commas.reshape(lines, _FIELDS - 1)
+	else:
+		separators[:, :-1] = ends[:, np.newaxis]
+		line = np.repeat(np.arange(lines), count)
+		rank = np.arange(len(line)) - np.repeat(np.cumsum(count) - count, count)
+		# Commas past the last field belong to it, and must not replace the line end.
+		keep = rank < _FIELDS - 1
+		separators[line[keep], rank[keep]] = commas[np.repeat(first, count)[keep] + rank[keep]]
+
+	# Padded, so fields can be read up to their width without checking the end of the chunk.
+	# windows[i] is the text starting at byte i.
+	padded = np.concatenate((buf, np.zeros(_COORDINATE_WIDTH, dtype=np.uint8)))
+	windows = np.lib.stride_tricks.sliding_window_view(padded, _COORDINATE_WIDTH)
+
+	# Fields are handled as (width, lines) arrays of characters, one row per character, so
+	# every operation runs over all lines at once.
+
+	def field(n):
+		"""Returns the (start, end) of field n of every line. Missing fields are empty."""
+		start = starts if n == 0 else np.minimum(separators[:, n - 1] + 1, ends)
+		return start, separators[:, n]
+
+	def text(n, width):
+		"""Returns the characters of field n of every line, zero padded. Wider fields are empty."""
+		start, end = field(n)
+		length = end - start
+		length[length > width] = 0
+		chars = np.ascontiguousarray(windows[start, :width].T)
+		chars *= np.arange(width)[:, np.newaxis] < length
+		return chars
+
+	def number(n, width):
+		"""Returns field n of every line as float64, NaN if empty or not a number."""
+		values = np.full(lines, np.nan)
+		chars = text(n, width)
+		present = np.flatnonzero(chars[0])
+		chars = chars[:, present]
+
+		# Fields wider than width, like 50.659312345678, are rare, so convert one by one.
+		start, end = field(n)
+		for line in np.flatnonzero(end - start > width):
+			try:
+				values[line] = float(buf[start[line]:end[line]].tobytes())
+			except ValueError:
+				pass
+
+		# Plain decimals, like -90.12345: the digits as an integer, divided by a power of ten.
+		# Both are exact, so the result is the same as float().
+		negative = chars[0] == ord('-')
+		other = np.zeros(len(present), dtype=bool)
+		mantissa = np.zeros(len(present), dtype=np.int64)
+		count = np.zeros(len(present), dtype=np.intp)
+		decimals = np.zeros(len(present), dtype=np.intp)
+		point = np.zeros(len(present), dtype=np.intp)
+		for k in range(width):
+			digit = chars[k] - ord('0')
+			is_digit = digit < 10
+			is_point = chars[k] == ord('.')
+			np.multiply(mantissa, 10, out=mantissa, where=is_digit)
+			np.add(mantissa, digit, out=mantissa, where=is_digit)
+			count += is_digit
+			if k:
+				decimals += is_digit & (point > 0)
+			point += is_point
+			allowed = is_digit | is_point | (chars[k] == 0)
+			other |= ~(allowed | negative) if k == 0 else ~allowed
+		plain = ~other & (point <= 1) & (count > 0) & (count <= 15)
+
+		parsed = mantissa / _POWERS_OF_TEN[decimals]
+		parsed[negative] *= -1
+		values[present[plain]] = parsed[plain]
+
+		# Anything else, like 1e3. Rare, so convert one by one.
+		for column in np.flatnonzero(~plain):
+			try:
+				values[present[column]] = float(chars[:, column].tobytes().rstrip(b'\0'))
+			except ValueError:
+				pass
+		return values
+
+	def digits(chars, positions):
+		"""Returns the decimal number in positions of every line, -1 if not all digits."""
+		result = np.zeros(lines, dtype=np.int64)
+		ok = np.ones(lines, dtype=bool)
+		for k in positions:
+			digit = chars[k] - ord('0')
+			ok &= digit < 10
+			result = result * 10 + digit
+		return np.where(ok, result, -1)
+
+	message_type = text(0, 3)
+	is_msg = (message_type == np.frombuffer(b'MSG', dtype=np.uint8)[:, np.newaxis]).all(axis=0)
+
+	transmission_type = number(1, 1)
+	has_type = ~np.isnan(transmission_type)
+	transmission_type = np.where(has_type, transmission_type, 0).astype(np.uint8)
+
+	# Hexident: exactly 6 hexadecimal digits.
+	start, end = field(4)
+	nibbles = _HEX_VALUES[text(4, 6)]
+	good_hex = (end - start == 6) & (nibbles < 16).all(axis=0)
+	hexident = np.zeros(lines, dtype=np.uint32)
+	for k in range(6):
+		hexident = (hexident << 4) | nibbles[k]
+	hexident[~good_hex] = 0
+
+	altitude = number(11, _NUMBER_WIDTH)
+	latitude = number(14, _COORDINATE_WIDTH)
+	longitude = number(15, _COORDINATE_WIDTH)
+
+	# Generation time: YYYY/MM/DD and HH:MM:SS.mmm
+	date = text(6, 10)
+	clock = text(7, 12)
+	year = digits(date, [0, 1, 2, 3])
+	month = digits(date, [5, 6])
+	day = digits(date, [8, 9])
+	hour = digits(clock, [0, 1])
+	minute = digits(clock, [3, 4])
+	second = digits(clock, [6, 7])
+	millis = digits(clock, [9, 10, 11])
+	good_time = (year >= 0) & (month >= 1) & (month <= 12) & (day >= 1) & (hour >= 0) & (minute >= 0) & \
+		(second >= 0) & (millis >= 0)
+	# Days since 1970-01-01 of the proleptic Gregorian calendar.
+	# http://howardhinnant.github.io/date_algorithms.html#days_from_civil
+	y = year - (month <= 2)
+	era = y // 400
+	yoe = y - era * 400
+	doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+	doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+	days = era * 146097 + doe - 719468
+	timestamp = days * 86400.0 + hour * 3600 + minute * 60 + second + millis / 1000
+	timestamp[~good_time] = np.nan
+
+	valid = is_msg & has_type
+
+	return MessageColumns(hexident, transmission_type, altitude, latitude, longitude, timestamp, valid)
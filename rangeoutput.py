@@ -0,0 +1,259 @@
+# Copyright 2016 Travis Painter (travis.painter@gmail.com)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+
+import numpy as np
+
+# Contours written to the density file: the range within which this
+# percentage of each sector's points were seen.
+DENSITY_PERCENTILES = (50, 90, 99)
+
+
+def atomicWrite(filename, data):
+    """
+    Replace a text file without readers ever seeing it half written.
+    
+    The data is written to a temporary file that is then renamed over filename.
+    """
+    tempname = filename + '.tmp'
+    with open(tempname, 'w') as outfile:
+        outfile.write(data)
+    os.replace(tempname, filename)
+
+
+class CachedWriter():
+    """
+    Base of the range writers. Only sectors changed since the last write are
+    formatted again, and nothing is written if no sector changed.
+    
+    Subclasses set kind and extension, and implement _layers(), _fragment()
+    and _document().
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.filename = '{}_range.{}'.format(name, self.extension)
+        # The AntennaRange written last, even when given as a snapshot.
+        self.source = None
+        self.num_layer = 0
+        # Epoch of the range at the last write.
+        self.epoch = -1
+        # Formatted text of every [layer][sector].
+        self.fragments = None
+        
+    def write(self, antenna_range):
+        """
+        Write the range if it changed since the last write.
+        
+        antenna_range is an AntennaRange, or a RangeSnapshot when writing
+        from another thread than the one adding points.
+        Returns True if the file was written.
+        """
+        source = getattr(antenna_range, 'origin', antenna_range)
+        if source is not self.source:
+            self.source = source
+            self.num_layer = antenna_range.num_layer
+            self.epoch = -1
+            self.fragments = [[''] * antenna_range.num_sector for x in range(self._layers())]
+            
+        # Read the epoch first. Changes made while writing are picked up next time.
+        epoch = antenna_range.epoch
+        # Only the layers written count, so changes to other layers don't rewrite the file.
+        changed = antenna_range.changed_since(self.epoch)[:self._layers()]
+        if not changed.any() and os.path.exists(self.filename):
+            print("Range unchanged, not writing: {}".format(self.filename))
+            self.epoch = epoch
+            return False
+        
+        print("Writing points to {} file: {} (fast-rejected {} of {} points)".format(
+            self.kind, self.filename, antenna_range.points_rejected, antenna_range.points_seen))
+        layers = antenna_range.view()
+        for layer, sector in zip(*np.nonzero(changed)):
+            lat, lon, r = layers[layer, sector].tolist()
+            if lat != lat:
+                # Empty sector
+                self.fragments[layer][sector] = self._fragment(layer, None, None)
+            else:
+                self.fragments[layer][sector] = self._fragment(layer, lat, lon)
+        
+        atomicWrite(self.filename, self._document())
+        self.epoch = epoch
+        return True
+
+
+class JsonWriter(CachedWriter):
+    """
+    Writes layer 0 of a range to {name}_range.json, as a list of [lat, lon].
+    """
+    
+    kind = 'json'
+    extension = 'json'
+    
+    def _layers(self):
+        return 1
+        
+    def _fragment(self, layer, lat, lon):
+        return json.dumps([lat, lon])
+        
+    def _document(self):
+        return '[' + ', '.join(self.fragments[0]) + ']'
+
+
+class KmlWriter(CachedWriter):
+    """
+    Writes every layer of a range to {name}_range.kml, as one polygon per layer.
+    """
+    
+    kind = 'KML'
+    extension = 'kml'
+    
+    def _layers(self):
+        return self.num_layer + 1
+        
+    def _fragment(self, layer, lat, lon):
+        # KML takes points in the form of [long],[lat],[alt]
+        if lat is None:
+            return ''
+        return "{},{},{:.1f} ".format(lon, lat, layer*10000/0.3048)
+        
+    def _document(self):
+        parts = ['''<?xml version="1.0" encoding="UTF-8"?>
+                        <kml xmlns="http://www.opengis.net/kml/2.2">
+                        <Folder><name>{} Ranges</name>'''.format(self.name)]
+        for n in range(self._layers()):
+            parts.append('''<Placemark>
+                            <name>{}_{}ft</name>
+                            <Polygon>
+                              <extrude>1</extrude>
+                              <tessellate>1</tessellate>
+                              <altitudeMode>relativeToGround</altitudeMode>
+                              <outerBoundaryIs>
+                                <LinearRing>
+                                  <coordinates>'''.format(self.name, n*10000))
+            parts.extend(self.fragments[n])
+            parts.append('''
+                                  </coordinates>
+                                </LinearRing>
+                              </outerBoundaryIs>
+                            </Polygon>
+                            </Placemark>''')
+        parts.append('''</Folder></kml>''')
+        return ''.join(parts)
+
+
+class RangeOutput():
+    """
+    All the files written for one range: KML or JSON, optionally a snapshot,
+    and the density file if the range keeps a density.
+    
+    Keep one instance per range, so unchanged sectors and files are not
+    formatted or written again.
+    """
+    
+    def __init__(self, name, format='kml', snapshot=False):
+        self.name = name
+        if format == 'json':
+            self.writer = JsonWriter(name)
+        else:
+            self.writer = KmlWriter(name)
+        self.snapshot = snapshot
+        # (range, epoch, points seen, points rejected) at the last snapshot write.
+        self.snapshotState = None
+        # Points seen at the last density write.
+        self.densitySeen = -1
+        # Writes may come from several threads. Only one at a time.
+        self.lock = threading.Lock()
+        
+    def write(self, antenna_range):
+        """
+        Write whatever changed since the last write.
+        
+        From another thread than the one adding points, pass
+        antenna_range.snapshot() taken on the adding thread.
+        """
+        with self.lock:
+            self.writer.write(antenna_range)
+            # The counters are checkpointed too, even when no sector changed.
+            state = (getattr(antenna_range, 'origin', antenna_range), antenna_range.epoch, 
+                     antenna_range.points_seen, antenna_range.points_rejected)
+            if self.snapshot and state != self.snapshotState:
+                writeSnapshot(self.name, antenna_range)
+                self.snapshotState = state
+            # The density changes with every point, even when the range doesn't.
+            if antenna_range.density is not None and antenna_range.points_seen != self.densitySeen:
+                writeDensity(self.name, antenna_range)
+                self.densitySeen = antenna_range.points_seen
+
+
+def writeJson(name, antenna_range):
+    """
+    Write layer 0 of the range to {name}_range.json.
+    """
+    JsonWriter(name).write(antenna_range)
+
+
+def writeKml(name, antenna_range):
+    """
+    Write every layer of the range to {name}_range.kml.
+    """
+    KmlWriter(name).write(antenna_range)
+
+
+def writeDensity(name, antenna_range):
+    """
+    Write the density of the range to {name}_density.json.
+    
+    For every layer there is a contour per DENSITY_PERCENTILES, as a list
+    of [lat, lon] (null in sectors without points). Layer 0 also has the
+    heatmap: [lat, lon, count] at the middle of every sector and range bin
+    with points.
+    """
+    filename = '{}_density.json'.format(name)
+    print("Writing density file: {}".format(filename))
+    layers = []
+    for n in range(antenna_range.num_layer + 1):
+        layers.append({
+            'altitude': n*10000,
+            'contours': {str(p): antenna_range.density_contour(p, n) for p in DENSITY_PERCENTILES},
+            })
+    document = {
+        'center': antenna_range.center,
+        'bin_km': antenna_range.density.bin_km,
+        'points': antenna_range.points_seen,
+        'layers': layers,
+        'heatmap': antenna_range.density_cells(0),
+        }
+    atomicWrite(filename, json.dumps(document))
+
+
+def writeSnapshot(name, antenna_range):
+    """
+    Write a snapshot of the range to {name}_range.snap, for adsb_aggregate.py.
+    
+    The file is replaced atomically, so readers never see a partial snapshot.
+    It is also the checkpoint that adsb_range.py --resume starts from.
+    """
+    filename = snapshotFilename(name)
+    print("Writing snapshot file: {}".format(filename))
+    antenna_range.save(filename)
+
+
+def snapshotFilename(name):
+    """
+    Name of the snapshot file of a receiver.
+    """
+    return '{}_range.snap'.format(name)
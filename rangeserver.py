@@ -0,0 +1,213 @@
+# Copyright 2016 Travis Painter (travis.painter@gmail.com)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+
+def rangeGeoJson(name, snapshot):
+    """
+    Returns the layers of a range snapshot as a GeoJSON FeatureCollection.
+    
+    Every layer is a polygon feature, with the lowest altitude of the layer
+    in feet. Empty sectors are left out.
+    """
+    features = []
+    for n in range(snapshot.num_layer + 1):
+        ring = [[lon, lat] for lat, lon in snapshot.range_shape(n) if lat is not None]
+        if ring:
+            # GeoJSON rings are closed.
+            ring.append(ring[0])
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [ring] if ring else []},
+            'properties': {'name': name, 'layer': n, 'altitude': n*10000},
+            })
+    return {'type': 'FeatureCollection', 'epoch': snapshot.epoch, 'features': features}
+
+
+def rangeDelta(snapshot, since):
+    """
+    Returns the sectors of a range snapshot changed after epoch since.
+    """
+    layers = snapshot.view()
+    sectors = []
+    for layer, sector in zip(*np.nonzero(snapshot.changed_since(since))):
+        lat, lon, r = layers[layer, sector].tolist()
+        sectors.append({'layer': int(layer), 'sector': int(sector), 'lat': lat, 'lon': lon, 'range': r})
+    return {'epoch': snapshot.epoch, 'since': since, 'sectors': sectors}
+
+
+class CachedResponse():
+    """
+    A response body, serialized once. The gzipped body is made on first use and kept.
+    """
+    
+    def __init__(self, document, etag):
+        self.body = json.dumps(document).encode('utf-8')
+        self.etag = etag
+        self._gzipped = None
+        
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body)
+        return self._gzipped
+
+
+class RangeServer():
+    """
+    Small HTTP server publishing the current range of every receiver.
+    
+    Endpoints:
+        /                          receivers and their current epoch
+        /{name}.geojson            all layers as a GeoJSON FeatureCollection
+        /{name}/delta?since=EPOCH  sectors changed after EPOCH
+        /stats                     counters and timings of every receiver
+    
+    Connections publish() snapshots from the thread adding points. Responses
+    are serialized once per receiver and epoch, support ETag/If-None-Match
+    and gzip.
+    """
+    
+    def __init__(self, port, address='127.0.0.1'):
+        self.snapshots = {}
+        self.stats = {}
+        self.cache = {}
+        # ETags must change when the server restarts and epochs start over.
+        self.token = '{:x}'.format(int(time.time()))
+        
+        server = self
+        
+        class Handler(RangeRequestHandler):
+            rangeServer = server
+        
+        self.httpd = ThreadingHTTPServer((address, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        print("Serving ranges on http://{}:{}/".format(address, port))
+        
+    def publish(self, name, snapshot):
+        """
+        Make a new snapshot of a receiver's range available.
+        """
+        self.snapshots[name] = snapshot
+        
+    def publishStats(self, name, summary):
+        """
+        Make the latest metrics.Metrics summary of a receiver available.
+        """
+        self.stats[name] = summary
+        
+    def geojson(self, name):
+        """
+        Returns the CachedResponse of a receiver's GeoJSON, or None if unknown.
+        """
+        snapshot = self.snapshots.get(name)
+        if snapshot is None:
+            return None
+        
+        cached = self.cache.get(name)
+        if cached is None or cached[0] != snapshot.epoch:
+            etag = '"{}-{}"'.format(self.token, snapshot.epoch)
+            cached = (snapshot.epoch, CachedResponse(rangeGeoJson(name, snapshot), etag))
+            self.cache[name] = cached
+        return cached[1]
+        
+    def close(self):
+        self.httpd.shutdown()
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles requests for a RangeServer, set as rangeServer.
+    """
+    
+    def do_HEAD(self):
+        self.do_GET(body=False)
+        
+    def do_GET(self, body=True):
+        self.sendBody = body
+        url = urlsplit(self.path)
+        path = url.path.strip('/')
+        server = self.rangeServer
+        
+        if path == '':
+            receivers = {name: s.epoch for name, s in server.snapshots.items()}
+            self.sendResponse(CachedResponse({'receivers': receivers}, None))
+        elif path == 'stats':
+            self.sendResponse(CachedResponse({'receivers': dict(server.stats)}, None))
+        elif path.endswith('.geojson'):
+            response = server.geojson(path[:-len('.geojson')])
+            if response is None:
+                self.send_error(404, "Unknown receiver")
+            elif self.etag(response) in self.headers.get('If-None-Match', ''):
+                self.send_response(304)
+                self.send_header('ETag', self.etag(response))
+                self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+            else:
+                self.sendResponse(response)
+        elif path.endswith('/delta'):
+            snapshot = server.snapshots.get(path[:-len('/delta')])
+            try:
+                since = int(parse_qs(url.query).get('since', ['-1'])[0])
+            except ValueError:
+                self.send_error(400, "since must be an epoch number")
+                return
+            if snapshot is None:
+                self.send_error(404, "Unknown receiver")
+            else:
+                self.sendResponse(CachedResponse(rangeDelta(snapshot, since), None))
+        else:
+            self.send_error(404)
+            
+    def acceptsGzip(self):
+        return 'gzip' in self.headers.get('Accept-Encoding', '')
+        
+    def etag(self, response):
+        """
+        ETag of the body sent for this request. The gzipped body has an ETag
+        of its own, as it is a different representation.
+        """
+        if response.etag and self.acceptsGzip():
+            return response.etag[:-1] + '-gz"'
+        return response.etag
+            
+    def sendResponse(self, response):
+        gzipped = self.acceptsGzip()
+        body = response.gzipped() if gzipped else response.body
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        if response.etag:
+            self.send_header('ETag', self.etag(response))
+        self.end_headers()
+        if self.sendBody:
+            self.wfile.write(body)
+        
+    def log_message(self, format, *args):
+        # Keep the console for collection messages.
+        pass